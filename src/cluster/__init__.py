@@ -0,0 +1,3 @@
+from cluster.lock import ClusterLock
+from cluster.invalidation import listen_cache_invalidation
+from cluster.updates import UpdatesFrontend, UpdatesWorker
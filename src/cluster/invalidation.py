@@ -0,0 +1,40 @@
+import asyncio
+from loguru import logger
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from services.cache import schedule_cache, user_profile_cache, invalidation_channel
+from services.hierarchy import hierarchy
+
+
+async def listen_cache_invalidation(redis: Redis) -> None:
+    """Drop entries of in-process caches, which were invalidated by other bot processes"""
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(invalidation_channel)
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    try:
+                        apply_cache_invalidation(message['data'].decode())
+                    except ValueError:
+                        logger.exception(f'Failed try apply invalidation of cache: {message["data"]!r}')
+        except RedisError:
+            logger.exception('Failed try listen invalidation of caches, reconnecting')
+            await asyncio.sleep(1)
+
+
+def apply_cache_invalidation(message: str) -> None:
+    kind, _, keys = message.partition(':')
+    match kind:
+        case 'schedule':
+            schedule_cache.discard_local_group(int(keys))
+        case 'user':
+            user_profile_cache.discard_local(*(int(key) for key in keys.split(',')))
+        case 'hierarchy':
+            if keys != hierarchy.process_id:
+                hierarchy.discard_local()
+        case _:
+            logger.warning(f'Unknown invalidation of cache: {message}')
@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from uuid import uuid4
+
+from loguru import logger
+
+from redis.asyncio.client import Redis
+from redis.exceptions import WatchError, RedisError
+
+
+class ClusterLock:
+    """
+    Lock shared by all bot processes through Redis.
+    Lock expires after ttl, so it can also be used as lease, which is not released by owner.
+    Lease is kept alive while owner is busy with work, so it doesn't expire under the work.
+    """
+
+    def __init__(self, redis: Redis, name: str, ttl: float):
+        self.redis = redis
+        self.name = name
+        self.ttl = ttl
+        self._token: str | None = None
+
+    async def acquire(self) -> bool:
+        """Try acquire lock without waiting"""
+        token = uuid4().hex
+        if await self.redis.set(self.name, token, nx=True, px=int(self.ttl * 1000)):
+            self._token = token
+            return True
+        return False
+
+    async def release(self) -> None:
+        """Release lock, if it is still owned by this process"""
+        if self._token is None:
+            return
+
+        token, self._token = self._token, None
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.name)
+                if await pipe.get(self.name) != token.encode():
+                    await pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.delete(self.name)
+                await pipe.execute()
+            except WatchError:
+                # Lock was expired and taken by other process meanwhile
+                pass
+
+    async def extend(self) -> bool:
+        """Reset expiration of lock to ttl, if it is still owned by this process"""
+        if self._token is None:
+            return False
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.name)
+                if await pipe.get(self.name) != self._token.encode():
+                    await pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.pexpire(self.name, int(self.ttl * 1000))
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    @asynccontextmanager
+    async def keep_alive(self) -> AsyncIterator[None]:
+        """Extend owned lock every third of ttl, while body of context is running"""
+        keeper = asyncio.create_task(self._extend_forever())
+        try:
+            yield
+        finally:
+            keeper.cancel()
+            await asyncio.gather(keeper, return_exceptions=True)
+
+    async def _extend_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if not await self.extend():
+                    logger.warning(f'Lock {self.name} was lost before work was finished')
+                    return
+            except RedisError:
+                logger.exception(f'Failed try extend lock {self.name}')
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from collections import defaultdict
+from loguru import logger
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from config_loader import ClusterConfig
+
+_consumer_group = 'bot-workers'
+
+
+def get_stream_key(shard: int) -> str:
+    return f'bot:updates:{shard}'
+
+
+def get_chat_key(update: Update) -> int:
+    """Id of chat (or user) of update, updates with the same key are handled in order"""
+    chat, user = UserContextMiddleware.resolve_event_context(update)
+    if chat is not None:
+        return chat.id
+    if user is not None:
+        return user.id
+    return update.update_id
+
+
+class UpdatesFrontend:
+    """
+    Receive updates from Telegram by long polling and fan them out to Redis streams.
+    Updates are sharded by chat, so every chat is handled by one worker in order.
+    """
+
+    def __init__(self, redis: Redis, config: ClusterConfig):
+        self.redis = redis
+        self.config = config
+
+    async def publish(self, updates: list[Update]) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for update in updates:
+                chat_key = get_chat_key(update)
+                pipe.xadd(
+                    get_stream_key(chat_key % self.config.shards),
+                    {'chat': chat_key, 'update': update.json(exclude_none=True, by_alias=True)},
+                    maxlen=self.config.stream_maxlen, approximate=True,
+                )
+            await pipe.execute()
+
+    async def run_polling(
+            self, bot: Bot, allowed_updates: list[str] | None = None, polling_timeout: int = 30
+    ) -> None:
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(
+                    offset=offset, timeout=polling_timeout, allowed_updates=allowed_updates,
+                    request_timeout=polling_timeout + 10
+                )
+                if updates:
+                    # Offset confirms updates in Telegram, so it is moved only after publishing
+                    await self.publish(updates)
+                    offset = updates[-1].update_id + 1
+            except Exception:
+                logger.exception('Failed try receive updates and publish them to workers')
+                await asyncio.sleep(5)
+
+
+class UpdatesWorker:
+    """
+    Handle updates of one shard from Redis stream with dispatcher.
+    Updates of different chats in a batch are handled concurrently, updates of one chat in order.
+    Not acknowledged updates of crashed worker are handled again after restart.
+    """
+
+    def __init__(self, redis: Redis, config: ClusterConfig):
+        self.redis = redis
+        self.config = config
+        self.stream = get_stream_key(config.shard)
+        self.consumer = f'shard-{config.shard}'
+
+    async def run(self, dp: Dispatcher, bot: Bot) -> None:
+        await self._create_consumer_group()
+        # Pending updates of this consumer are read first, then new ones
+        last_id = '0'
+        while True:
+            try:
+                response = await self.redis.xreadgroup(
+                    _consumer_group, self.consumer, {self.stream: last_id},
+                    count=self.config.batch_size, block=self.config.block_timeout
+                )
+                entries = response[0][1] if response else []
+                if not entries:
+                    last_id = '>'
+                    continue
+
+                await self._handle_entries(dp, bot, entries)
+                await self.redis.xack(
+                    self.stream, _consumer_group, *(entry_id for entry_id, _ in entries)
+                )
+            except RedisError:
+                logger.exception(f'Failed try read or acknowledge updates of {self.stream}')
+                # Not acknowledged updates are read again, when Redis is available
+                last_id = '0'
+                await asyncio.sleep(5)
+
+    async def _handle_entries(self, dp: Dispatcher, bot: Bot, entries: list) -> None:
+        chats_updates: dict[bytes, list[dict]] = defaultdict(list)
+        for _, fields in entries:
+            chats_updates[fields[b'chat']].append(json.loads(fields[b'update']))
+
+        await asyncio.gather(*(
+            self._handle_chat_updates(dp, bot, updates) for updates in chats_updates.values()
+        ))
+
+    @staticmethod
+    async def _handle_chat_updates(dp: Dispatcher, bot: Bot, updates: list[dict]) -> None:
+        for update in updates:
+            try:
+                result = await dp.feed_raw_update(bot, update)
+                if isinstance(result, TelegramMethod):
+                    await dp.silent_call_request(bot, result)
+            except Exception:
+                logger.exception(f'Failed try handle update #{update.get("update_id")}')
+
+    async def _create_consumer_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(self.stream, _consumer_group, id='0', mkstream=True)
+        except ResponseError as error:
+            if 'BUSYGROUP' not in str(error):
+                raise
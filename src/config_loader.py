@@ -4,6 +4,15 @@ from os import getenv
 
 class BotConfig(NamedTuple):
     token: str
+    mode: str = "polling"
+
+
+class WebhookConfig(NamedTuple):
+    url: str
+    path: str
+    host: str
+    port: int
+    secret_token: str
 
 
 class DatabaseConfig(NamedTuple):
@@ -11,6 +20,13 @@ class DatabaseConfig(NamedTuple):
     db_name: str
     user: str
     password: str
+    pool_size: int = 10
+    max_overflow: int = 5
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_warm_up: bool = True
+    statement_cache_size: int = 100
 
 
 class RedisConfig(NamedTuple):
@@ -20,12 +36,68 @@ class RedisConfig(NamedTuple):
     db: int = 0
 
 
+class ParserConfig(NamedTuple):
+    limit_per_host: int
+    keepalive_timeout: float
+    dns_cache_ttl: int
+    timeout: float
+    backend: str = "lxml"
+    executor: str = "process"
+    workers: int = 2
+
+
+class CacheConfig(NamedTuple):
+    schedule_size: int
+    schedule_ttl: int
+    user_size: int
+    user_ttl: int
+
+
+class ClusterConfig(NamedTuple):
+    shards: int = 1
+    shard: int = 0
+    stream_maxlen: int = 10000
+    batch_size: int = 16
+    block_timeout: int = 5000
+
+
+class OutboundConfig(NamedTuple):
+    global_rate: float = 30
+    chat_rate: float = 1
+    group_rate: float = 20 / 60
+    chat_burst: int = 3
+    max_retries: int = 3
+    senders: int = 8
+
+
+class RefreshConfig(NamedTuple):
+    enabled: bool
+    interval: int
+    concurrency: int
+    host_rate: float
+    jitter: float
+
+
+class GarbageCollectorConfig(NamedTuple):
+    enabled: bool
+    interval: int
+    batch_size: int
+    batch_pause: float
+
+
 def load_config_db() -> DatabaseConfig:
     return DatabaseConfig(
         host=getenv("DB_HOST"),
         db_name=getenv("DB_NAME"),
         user=getenv("DB_USER"),
-        password=getenv("DB_PASS")
+        password=getenv("DB_PASS"),
+        pool_size=int(getenv("DB_POOL_SIZE", 10)),
+        max_overflow=int(getenv("DB_MAX_OVERFLOW", 5)),
+        pool_timeout=float(getenv("DB_POOL_TIMEOUT", 30)),
+        pool_recycle=int(getenv("DB_POOL_RECYCLE", 30 * 60)),
+        pool_pre_ping=_getenv_bool("DB_POOL_PRE_PING", True),
+        pool_warm_up=_getenv_bool("DB_POOL_WARM_UP", True),
+        statement_cache_size=int(getenv("DB_STATEMENT_CACHE_SIZE", 100)),
     )
 
 
@@ -39,5 +111,106 @@ def load_config_redis() -> RedisConfig:
 
 def load_config_bot() -> BotConfig:
     return BotConfig(
-        token=getenv("BOT_TOKEN")
+        token=getenv("BOT_TOKEN"),
+        mode=getenv("BOT_MODE", "polling"),
     )
+
+
+def load_config_webhook() -> WebhookConfig:
+    return WebhookConfig(
+        url=_getenv_required("WEBHOOK_URL"),
+        path=getenv("WEBHOOK_PATH", "/webhook"),
+        host=getenv("WEBHOOK_HOST", "0.0.0.0"),
+        port=int(getenv("WEBHOOK_PORT", 8080)),
+        # Without secret token anyone, who knows URL, can send updates to the bot
+        secret_token=_getenv_required("WEBHOOK_SECRET"),
+    )
+
+
+def load_config_parser() -> ParserConfig:
+    return ParserConfig(
+        limit_per_host=int(getenv("PARSER_LIMIT_PER_HOST", 8)),
+        keepalive_timeout=float(getenv("PARSER_KEEPALIVE_TIMEOUT", 60)),
+        dns_cache_ttl=int(getenv("PARSER_DNS_CACHE_TTL", 600)),
+        timeout=float(getenv("PARSER_TIMEOUT", 30)),
+        backend=_getenv_choice("PARSER_BACKEND", "lxml", ("lxml", "bs4")),
+        executor=_getenv_choice("PARSER_EXECUTOR", "process", ("process", "thread", "none")),
+        workers=int(getenv("PARSER_WORKERS", 2)),
+    )
+
+
+def load_config_cache() -> CacheConfig:
+    return CacheConfig(
+        schedule_size=int(getenv("CACHE_SCHEDULE_SIZE", 4096)),
+        schedule_ttl=int(getenv("CACHE_SCHEDULE_TTL", 24 * 60 * 60)),
+        user_size=int(getenv("CACHE_USER_SIZE", 100_000)),
+        user_ttl=int(getenv("CACHE_USER_TTL", 60 * 60)),
+    )
+
+
+def load_config_outbound() -> OutboundConfig:
+    return OutboundConfig(
+        global_rate=float(getenv("OUTBOUND_GLOBAL_RATE", 30)),
+        chat_rate=float(getenv("OUTBOUND_CHAT_RATE", 1)),
+        group_rate=float(getenv("OUTBOUND_GROUP_RATE", 20 / 60)),
+        chat_burst=int(getenv("OUTBOUND_CHAT_BURST", 3)),
+        max_retries=int(getenv("OUTBOUND_MAX_RETRIES", 3)),
+        senders=int(getenv("OUTBOUND_SENDERS", 8)),
+    )
+
+
+def load_config_refresh() -> RefreshConfig:
+    return RefreshConfig(
+        enabled=_getenv_bool("REFRESH_ENABLED", True),
+        interval=_getenv_positive("REFRESH_INTERVAL", 6 * 60 * 60, int),
+        concurrency=_getenv_positive("REFRESH_CONCURRENCY", 8, int),
+        host_rate=_getenv_positive("REFRESH_HOST_RATE", 4, float),
+        jitter=float(getenv("REFRESH_JITTER", 1)),
+    )
+
+
+def load_config_garbage_collector() -> GarbageCollectorConfig:
+    return GarbageCollectorConfig(
+        enabled=_getenv_bool("GC_ENABLED", True),
+        interval=_getenv_positive("GC_INTERVAL", 24 * 60 * 60, int),
+        batch_size=_getenv_positive("GC_BATCH_SIZE", 500, int),
+        batch_pause=float(getenv("GC_BATCH_PAUSE", 0.5)),
+    )
+
+
+def load_config_cluster() -> ClusterConfig:
+    return ClusterConfig(
+        shards=int(getenv("CLUSTER_SHARDS", 1)),
+        shard=int(getenv("CLUSTER_SHARD", 0)),
+        stream_maxlen=int(getenv("CLUSTER_STREAM_MAXLEN", 10000)),
+        batch_size=int(getenv("CLUSTER_BATCH_SIZE", 16)),
+        block_timeout=int(getenv("CLUSTER_BLOCK_TIMEOUT", 5000)),
+    )
+
+
+def _getenv_bool(key: str, default: bool) -> bool:
+    value = getenv(key)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def _getenv_positive(key: str, default: int | float, type_: type[int | float]) -> int | float:
+    value = type_(getenv(key, default))
+    if value <= 0:
+        raise ValueError(f'{key} must be positive, got {value}')
+    return value
+
+
+def _getenv_choice(key: str, default: str, choices: tuple[str, ...]) -> str:
+    value = getenv(key, default)
+    if value not in choices:
+        raise ValueError(f'{key} must be one of {", ".join(choices)}, got {value!r}')
+    return value
+
+
+def _getenv_required(key: str) -> str:
+    value = getenv(key)
+    if not value:
+        raise ValueError(f'{key} must be set')
+    return value
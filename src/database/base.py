@@ -1,6 +1,9 @@
-from typing import TypeAlias
+import asyncio
+from typing import TypeAlias, Any
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import (
+    create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+)
 from sqlalchemy.orm import DeclarativeBase
 
 from config_loader import load_config_db, DatabaseConfig
@@ -8,18 +11,44 @@ from config_loader import load_config_db, DatabaseConfig
 sqlalchemy_url: TypeAlias = str
 
 
-def get_sqlalchemy_url() -> sqlalchemy_url:
+def get_sqlalchemy_url(config_db: DatabaseConfig | None = None) -> sqlalchemy_url:
     """Get SQLAlchemy URL for work with database from config"""
-    config_db: DatabaseConfig = load_config_db()
+    config_db = config_db or load_config_db()
     return (
         f'postgresql+asyncpg://{config_db.user}:{config_db.password}@'
         f'{config_db.host}/{config_db.db_name}'
+        f'?prepared_statement_cache_size={config_db.statement_cache_size}'
     )
 
 
+def get_engine_options(config_db: DatabaseConfig) -> dict[str, Any]:
+    """Get options of connection pool for engine from config"""
+    return {
+        'pool_size': config_db.pool_size,
+        'max_overflow': config_db.max_overflow,
+        'pool_timeout': config_db.pool_timeout,
+        'pool_recycle': config_db.pool_recycle,
+        'pool_pre_ping': config_db.pool_pre_ping,
+    }
+
+
+async def warm_up_pool(engine: AsyncEngine, connections_count: int) -> None:
+    """Open connections of pool beforehand, so first updates don't wait for them"""
+    connections = [engine.connect() for _ in range(connections_count)]
+    try:
+        await asyncio.gather(*(connection.start() for connection in connections))
+    finally:
+        await asyncio.gather(
+            *(connection.close() for connection in connections), return_exceptions=True
+        )
+
+
+_config_db: DatabaseConfig = load_config_db()
+
 engine = create_async_engine(
-    get_sqlalchemy_url(),
-    future=True
+    get_sqlalchemy_url(_config_db),
+    future=True,
+    **get_engine_options(_config_db)
 )
 
 sessionmaker_async = async_sessionmaker(
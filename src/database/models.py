@@ -1,4 +1,7 @@
-from sqlalchemy import Column, ForeignKey, String, Integer, Boolean, Table, UniqueConstraint
+from sqlalchemy import (
+    Column, ForeignKey, String, Integer, Boolean, Table, UniqueConstraint, Index
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, Mapped
 
 from database.base import Base
@@ -8,7 +11,9 @@ class User(Base):
     __tablename__ = 'bot_users'
 
     id: Mapped[int] = Column(Integer, primary_key=True)
-    group_id: Mapped[int] = Column(Integer, ForeignKey('bot_groups.id'))
+    group_id: Mapped[int] = Column(
+        Integer, ForeignKey('bot_groups.id', ondelete='CASCADE'), index=True
+    )
     is_admin: Mapped[bool] = Column(Boolean, default=False, nullable=False)
 
     Group = relationship('Group')
@@ -34,7 +39,9 @@ class Department(Base):
     id: Mapped[int] = Column(Integer, primary_key=True)
     title: Mapped[str] = Column(String(100), nullable=False, unique=True)
     title_short: Mapped[str] = Column(String(10), nullable=False)
-    faculty_id: Mapped[int] = Column(Integer, ForeignKey('bot_faculties.id'))
+    faculty_id: Mapped[int] = Column(
+        Integer, ForeignKey('bot_faculties.id', ondelete='CASCADE'), index=True
+    )
 
     Faculty = relationship('Faculty')
 
@@ -46,9 +53,14 @@ class Group(Base):
     __tablename__ = 'bot_groups'
 
     id: Mapped[int] = Column(Integer, primary_key=True)
-    title: Mapped[str] = Column(String(10))
+    title: Mapped[str] = Column(String(10), index=True)
     schedule_url: Mapped[str] = Column(String(200))
-    department_id: Mapped[int] = Column(Integer, ForeignKey('bot_departments.id'))
+    schedule_etag: Mapped[str] = Column(String(200))
+    schedule_last_modified: Mapped[str] = Column(String(50))
+    schedule_hash: Mapped[str] = Column(String(64))
+    department_id: Mapped[int] = Column(
+        Integer, ForeignKey('bot_departments.id', ondelete='CASCADE')
+    )
     __table_args__ = (
         UniqueConstraint('department_id', 'title', name='_department_id_title_str_uc'),
     )
@@ -69,13 +81,26 @@ class Discipline(Base):
         return f'<Discipline "{self.title}">'
 
 
-lesson_teacher = Table('lesson_teacher', Base.metadata,
-                       Column('lesson_id', Integer, ForeignKey('bot_lessons.id')),
-                       Column('teacher_id', Integer, ForeignKey('bot_teachers.id')))
-
-lesson_group = Table('lesson_group', Base.metadata,
-                     Column('lesson_id', Integer, ForeignKey('bot_lessons.id')),
-                     Column('group_id', Integer, ForeignKey('bot_groups.id')))
+lesson_teacher = Table(
+    'lesson_teacher', Base.metadata,
+    Column(
+        'lesson_id', Integer, ForeignKey('bot_lessons.id', ondelete='CASCADE'), primary_key=True
+    ),
+    Column('teacher_id', Integer, ForeignKey('bot_teachers.id'), primary_key=True),
+    Index('ix_lesson_teacher_teacher_id', 'teacher_id')
+)
+
+lesson_group = Table(
+    'lesson_group', Base.metadata,
+    Column(
+        'lesson_id', Integer, ForeignKey('bot_lessons.id', ondelete='CASCADE'), primary_key=True
+    ),
+    Column(
+        'group_id', Integer, ForeignKey('bot_groups.id', ondelete='CASCADE'), primary_key=True
+    ),
+    # Primary key starts with lesson_id, lessons of group are looked up by this index
+    Index('ix_lesson_group_group_id_lesson_id', 'group_id', 'lesson_id')
+)
 
 
 class Lesson(Base):
@@ -89,6 +114,13 @@ class Lesson(Base):
     day: Mapped[int] = Column(Integer, nullable=False)
     number_lesson: Mapped[int] = Column(Integer, nullable=False)
     type_and_location: Mapped[str] = Column(String(150), nullable=False)
+    __table_args__ = (
+        UniqueConstraint(
+            'discipline_id', 'week', 'day', 'number_lesson',
+            name='_lesson_discipline_week_day_number_uc'
+        ),
+        Index('ix_bot_lessons_week_day_number_lesson', 'week', 'day', 'number_lesson'),
+    )
 
     Discipline = relationship('Discipline')
 
@@ -96,6 +128,22 @@ class Lesson(Base):
         return f'<Lesson #{self.id} by Discipline "{self.Discipline.title}">'
 
 
+class GroupTimetable(Base):
+    """Lessons of group for week denormalized for rendering, rebuilt on ingestion of schedule"""
+    __tablename__ = 'group_timetable'
+
+    group_id: Mapped[int] = Column(
+        Integer, ForeignKey('bot_groups.id', ondelete='CASCADE'), primary_key=True
+    )
+    week: Mapped[int] = Column(Integer, primary_key=True)
+    group_title: Mapped[str] = Column(String(10))
+    # [[day, number_lesson, discipline, [teachers], type_and_location], ...]
+    lessons: Mapped[list] = Column(JSONB, nullable=False)
+
+    def __repr__(self):
+        return f'<GroupTimetable of group #{self.group_id} for week {self.week}>'
+
+
 class Teacher(Base):
     __tablename__ = 'bot_teachers'
 
@@ -110,7 +158,7 @@ class Task(Base):
     __tablename__ = 'bot_tasks'
 
     id: Mapped[int] = Column(Integer, primary_key=True)
-    user_id: Mapped[int] = Column(Integer, ForeignKey('bot_users.id'))
+    user_id: Mapped[int] = Column(Integer, ForeignKey('bot_users.id', ondelete='CASCADE'))
     description: Mapped[str] = Column(String(300), nullable=False)
 
     User = relationship('User')
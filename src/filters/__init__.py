@@ -0,0 +1 @@
+from filters.profile import IsRegistered, IsAdmin
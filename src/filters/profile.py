@@ -0,0 +1,18 @@
+from aiogram.filters import Filter
+from aiogram.types import TelegramObject
+
+from services.cache import UserProfile
+
+
+class IsRegistered(Filter):
+    """Pass updates from users registered in database"""
+
+    async def __call__(self, event: TelegramObject, user: UserProfile | None = None) -> bool:
+        return user is not None and user.is_registered
+
+
+class IsAdmin(Filter):
+    """Pass updates from registered users with admin rights"""
+
+    async def __call__(self, event: TelegramObject, user: UserProfile | None = None) -> bool:
+        return user is not None and user.is_registered and user.is_admin
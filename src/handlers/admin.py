@@ -4,7 +4,7 @@ from aiogram.filters import Command
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.admin import try_register_first_admin
-from services.utils import is_registered_user, is_user_admin
+from filters import IsAdmin
 
 _admin_commands = """
 <b>👨‍💻 Команди адміністратора:</b>
@@ -21,13 +21,9 @@ _admin_commands = """
 router = Router(name="admin-commands")
 
 
-@router.message(Command("cmds"))
-async def get_admin_commands(msg: types.Message, session: AsyncSession) -> None:
-    if (
-            await is_registered_user(msg, session=session) and
-            await is_user_admin(msg, session=session)
-    ):
-        await msg.answer(_admin_commands)
+@router.message(Command("cmds"), IsAdmin())
+async def get_admin_commands(msg: types.Message) -> None:
+    await msg.answer(_admin_commands)
 
 
 @router.message(Command("get_admin"))
@@ -2,45 +2,49 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from loguru import logger
 from aiogram import types, Router, F
+from aiogram.methods import SendMessage, EditMessageText
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from handlers.fsm.registration import start_registration
 from services.client import (
     get_lessons_today_or_tomorrow_for_user,
-    get_lessons_current_or_next_week_for_user,
-    get_group_id_by_user_id
+    get_lessons_current_or_next_week_for_user
 )
-from services.admin import get_groups_instances_by_title
+from services.hierarchy import search_groups_by_title
+from services.cache import UserProfile
 from keyboards.kb_with_groups_schedule import get_keyboard_with_groups
-from services.utils import is_registered_user
+from filters import IsRegistered
 
 router = Router(name="client-commands")
 
 
 @router.message(Command(commands=["help", "start"]))
-async def send_welcome(
-        msg: types.Message, session: AsyncSession, state: FSMContext
-) -> None:
+async def send_welcome(msg: types.Message, state: FSMContext, user: UserProfile) -> None:
     await msg.answer(
         f'Я бот-помічник для пошуку розкладу в КПІ. Приємно познайомитись, '
         f'{msg.from_user.first_name}.\n'
         f'Для початку роботи зі мною Ви повинні вказати групу, розклад якої вас цікавить.'
     )
 
-    if not await is_registered_user(msg, session=session):
+    if not user.is_registered:
         await start_registration(msg, state)
 
 
-@router.message(Command("current_week"))
-async def get_current_week_lessons(
-        msg: types.Message, session: AsyncSession, state: FSMContext
-) -> None:
-    if not await is_registered_user(msg, session=session):
-        await start_registration(msg, state)
-        return
+@router.message(
+    Command(commands=["current_week", "next_week", "today", "tomorrow"]), ~IsRegistered()
+)
+async def ask_registration(msg: types.Message, state: FSMContext) -> None:
+    await start_registration(msg, state)
+
 
-    group_id = await get_group_id_or_none(msg, session=session)
+# Schedule handlers return answer instead of sending it, so database session is released
+# before answer waits for its turn in outbound queue
+@router.message(Command("current_week"), IsRegistered())
+async def get_current_week_lessons(
+        msg: types.Message, session: AsyncSession, user: UserProfile
+) -> SendMessage | None:
+    group_id = await get_group_id_or_none(msg, user, session=session)
     if group_id is None:
         return
 
@@ -48,18 +52,14 @@ async def get_current_week_lessons(
         group_id=group_id,
         session=session
     )
-    await msg.answer(answer)
+    return msg.answer(answer)
 
 
-@router.message(Command("next_week"))
+@router.message(Command("next_week"), IsRegistered())
 async def get_next_week_lessons(
-        msg: types.Message, session: AsyncSession, state: FSMContext
-) -> None:
-    if not await is_registered_user(msg, session=session):
-        await start_registration(msg, state)
-        return
-
-    group_id = await get_group_id_or_none(msg, session=session)
+        msg: types.Message, session: AsyncSession, user: UserProfile
+) -> SendMessage | None:
+    group_id = await get_group_id_or_none(msg, user, session=session)
     if group_id is None:
         return
 
@@ -68,18 +68,14 @@ async def get_next_week_lessons(
         next_week=True,
         session=session
     )
-    await msg.answer(answer)
+    return msg.answer(answer)
 
 
-@router.message(Command("today"))
+@router.message(Command("today"), IsRegistered())
 async def get_today_lessons(
-        msg: types.Message, session: AsyncSession, state: FSMContext
-) -> None:
-    if not await is_registered_user(msg, session=session):
-        await start_registration(msg, state)
-        return
-
-    group_id = await get_group_id_or_none(msg, session=session)
+        msg: types.Message, session: AsyncSession, user: UserProfile
+) -> SendMessage | None:
+    group_id = await get_group_id_or_none(msg, user, session=session)
     if group_id is None:
         return
 
@@ -87,18 +83,14 @@ async def get_today_lessons(
         group_id=group_id,
         session=session
     )
-    await msg.answer(answer)
+    return msg.answer(answer)
 
 
-@router.message(Command("tomorrow"))
+@router.message(Command("tomorrow"), IsRegistered())
 async def get_tomorrow_lessons(
-        msg: types.Message, session: AsyncSession, state: FSMContext
-) -> None:
-    if not await is_registered_user(msg, session=session):
-        await start_registration(msg, state)
-        return
-
-    group_id = await get_group_id_or_none(msg, session=session)
+        msg: types.Message, session: AsyncSession, user: UserProfile
+) -> SendMessage | None:
+    group_id = await get_group_id_or_none(msg, user, session=session)
     if group_id is None:
         return
 
@@ -107,19 +99,29 @@ async def get_tomorrow_lessons(
         tomorrow=True,
         session=session
     )
-    await msg.answer(answer)
+    return msg.answer(answer)
 
 
-async def get_group_id_or_none(msg: types.Message, session: AsyncSession) -> int | None:
+async def get_group_id_or_none(
+        msg: types.Message, user: UserProfile, *, session: AsyncSession
+) -> int | None:
     """
     Check exist input group title. If not, send message. If yes, return group id.
-    If in database exist more than one group with same title, send message with list of groups.
+    If in database exist more than one group with same title or title is typed with mistake,
+    send message with list of groups.
     """
-    data = msg.text.split()  # /today <group_title>
+    data = msg.text.split(maxsplit=1)  # /today <group_title>
     if len(data) == 1:
-        return await get_group_id_by_user_id(user_id=msg.from_user.id, session=session)
+        return user.group_id
     else:
-        groups = await get_groups_instances_by_title(data[1], session=session)
+        is_exact, groups = await search_groups_by_title(data[1], session=session)
+        if groups and not is_exact:
+            await msg.answer(
+                f'Група з назвою <b>{data[1]}</b> не знайдена. Можливо, Ви мали на увазі:',
+                reply_markup=get_keyboard_with_groups(groups, data[0][1:], with_title=True)
+            )
+            return
+
         match len(groups):
             case 0:
                 await msg.answer(f'Група з назвою <b>{data[1]}</b> не знайдена в базі даних.')
@@ -135,7 +137,9 @@ async def get_group_id_or_none(msg: types.Message, session: AsyncSession) -> int
 
 
 @router.callback_query(F.data.startswith('group schedule'))
-async def group_schedule_callback(callback: types.CallbackQuery, session: AsyncSession) -> None:
+async def group_schedule_callback(
+        callback: types.CallbackQuery, session: AsyncSession
+) -> EditMessageText | None:
     data_inline_keyboard = callback.data.split()
     group_id = int(data_inline_keyboard[3])
 
@@ -166,5 +170,5 @@ async def group_schedule_callback(callback: types.CallbackQuery, session: AsyncS
             logger.error(f'Unknown command: {data_inline_keyboard[2]}')
             return
 
-    await callback.message.edit_text(answer, reply_markup=None)
     await callback.answer()
+    return callback.message.edit_text(answer, reply_markup=None)
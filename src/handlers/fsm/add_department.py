@@ -6,8 +6,8 @@ from aiogram.filters import Command
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.admin import create_department
-from services.utils import is_model_exist_by_name, is_user_admin, is_registered_user
-from database.models import Faculty, Department
+from services.hierarchy import hierarchy
+from filters import IsAdmin
 
 router = Router(name="fsm-add-department-router")
 
@@ -18,16 +18,10 @@ class FSMAddDepartment(StatesGroup):
     title_short = State()
 
 
-@router.message(Command("add_department"))
-async def start_add_new_department(
-        msg: types.Message, state: FSMContext, session: AsyncSession
-) -> None:
-    if (
-            await is_registered_user(msg, session=session) and
-            await is_user_admin(msg, session=session)
-    ):
-        await state.set_state(FSMAddDepartment.faculty)
-        await msg.answer('Введіть назву факультету, до якого належить кафедра.')
+@router.message(Command("add_department"), IsAdmin())
+async def start_add_new_department(msg: types.Message, state: FSMContext) -> None:
+    await state.set_state(FSMAddDepartment.faculty)
+    await msg.answer('Введіть назву факультету, до якого належить кафедра.')
 
 
 @router.message(FSMAddDepartment.faculty)
@@ -36,12 +30,11 @@ async def input_faculty_for_add_department(
 ) -> None:
     await state.update_data(faculty_name=msg.text)
 
-    is_exist, faculty_id = await is_model_exist_by_name(
-        msg.text, class_model=Faculty, session=session
-    )
-    if is_exist:
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    faculty = hierarchy_snapshot.faculty_by_title(msg.text)
+    if faculty is not None:
         await msg.answer('Факультет з такою назвою існує. Тепер введіть назву кафедри.')
-        await state.update_data(faculty_id=faculty_id)
+        await state.update_data(faculty_id=faculty.id)
         await state.set_state(FSMAddDepartment.title)
     else:
         await msg.answer('Помилка. Такого факультету в базі даних не було знайдено.')
@@ -53,10 +46,8 @@ async def input_title_for_add_department(
 ) -> None:
     await state.update_data(title=msg.text)
 
-    is_exist, department_id = await is_model_exist_by_name(
-        msg.text, class_model=Department, session=session
-    )
-    if is_exist:
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    if hierarchy_snapshot.department_by_title(msg.text) is not None:
         await msg.answer('Помилка. Кафедра з такою назвою вже існує.')
     else:
         await msg.answer('Тепер введіть абревіатуру кафедри (наприклад, ТПЗА).')
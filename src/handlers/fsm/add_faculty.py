@@ -6,8 +6,8 @@ from aiogram.filters import Command
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.admin import create_faculty
-from services.utils import is_model_exist_by_name, is_registered_user, is_user_admin
-from database.models import Faculty
+from services.hierarchy import hierarchy
+from filters import IsAdmin
 
 router = Router(name="fsm-add-faculty-router")
 
@@ -17,16 +17,10 @@ class FSMAddFaculty(StatesGroup):
     title_short = State()
 
 
-@router.message(Command("add_faculty"))
-async def start_add_new_faculty(
-        msg: types.Message, state: FSMContext, session: AsyncSession
-) -> None:
-    if (
-            await is_registered_user(msg, session=session) and
-            await is_user_admin(msg, session=session)
-    ):
-        await state.set_state(FSMAddFaculty.title)
-        await msg.answer('Введіть назву факультету.')
+@router.message(Command("add_faculty"), IsAdmin())
+async def start_add_new_faculty(msg: types.Message, state: FSMContext) -> None:
+    await state.set_state(FSMAddFaculty.title)
+    await msg.answer('Введіть назву факультету.')
 
 
 @router.message(FSMAddFaculty.title)
@@ -35,8 +29,8 @@ async def input_faculty_title(
 ) -> None:
     await state.update_data(title=msg.text)
 
-    is_exist, _ = await is_model_exist_by_name(msg.text, class_model=Faculty, session=session)
-    if is_exist:
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    if hierarchy_snapshot.faculty_by_title(msg.text) is not None:
         await msg.answer('Факультет з такою назвою вже існує.')
         await state.clear()
     else:
@@ -8,11 +8,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from services.admin import (
     add_information_from_schedule_to_db,
     create_group,
-    delete_group,
-    is_group_exist_by_title_and_department_id
+    delete_group
 )
-from services.utils import is_model_exist_by_name, is_registered_user, is_user_admin
-from database.models import Department, Group
+from services.hierarchy import hierarchy
+from filters import IsAdmin
+from database.models import Group
+from parser.client import ScheduleClient
 
 router = Router(name="fsm-add-group-router")
 
@@ -23,16 +24,10 @@ class FSMAddGroup(StatesGroup):
     url_schedule = State()
 
 
-@router.message(Command("add_group"))
-async def start_add_new_group(
-        msg: types.Message, state: FSMContext, session: AsyncSession
-) -> None:
-    if (
-            await is_registered_user(msg, session=session) and
-            await is_user_admin(msg, session=session)
-    ):
-        await state.set_state(FSMAddGroup.department)
-        await msg.answer('Введіть назву кафедри, до якої належить група.')
+@router.message(Command("add_group"), IsAdmin())
+async def start_add_new_group(msg: types.Message, state: FSMContext) -> None:
+    await state.set_state(FSMAddGroup.department)
+    await msg.answer('Введіть назву кафедри, до якої належить група.')
 
 
 @router.message(FSMAddGroup.department)
@@ -41,14 +36,11 @@ async def input_department_for_add_group(
 ) -> None:
     await state.update_data(department_name=msg.text)
 
-    is_exist, department_id = await is_model_exist_by_name(
-        msg.text,
-        class_model=Department,
-        session=session
-    )
-    if is_exist:
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    department = hierarchy_snapshot.department_by_title(msg.text)
+    if department is not None:
         await msg.answer('Кафедра з такою назвою існує. Тепер введіть назву групи.')
-        await state.update_data(department_id=department_id)
+        await state.update_data(department_id=department.id)
         await state.set_state(FSMAddGroup.title)
     else:
         await msg.answer('Помилка. Такої кафедри в базі даних не було знайдено.')
@@ -60,10 +52,9 @@ async def input_title_for_add_group(
 ) -> None:
     data = await state.update_data(title=msg.text)
 
-    is_exist, _ = await is_group_exist_by_title_and_department_id(
-        data['title'], data['department_id'], session=session
-    )
-    if is_exist:
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    group = hierarchy_snapshot.group_by_title(data['title'], department_id=data['department_id'])
+    if group is not None:
         await msg.answer('Помилка. Група з такою назвою на вказаній кафедрі вже існує.')
     else:
         await msg.answer(
@@ -75,7 +66,8 @@ async def input_title_for_add_group(
 
 @router.message(FSMAddGroup.url_schedule)
 async def input_url_schedule_for_add_group(
-        msg: types.Message, state: FSMContext, session: AsyncSession
+        msg: types.Message, state: FSMContext, session: AsyncSession,
+        schedule_client: ScheduleClient
 ) -> None:
     data = await state.update_data(url_schedule=msg.text)
 
@@ -86,7 +78,9 @@ async def input_url_schedule_for_add_group(
             data.get('url_schedule'),
             session=session
         )
-        result = await add_information_from_schedule_to_db(created_group, session=session)
+        result = await add_information_from_schedule_to_db(
+            created_group, session=session, schedule_client=schedule_client
+        )
         if result:
             await msg.answer('Група була створена і розклад скопійовано з сайту.')
         else:
@@ -6,14 +6,13 @@ from aiogram.filters import Text, Command
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.admin import (
-    get_department_instance_by_title,
     change_faculty_for_department,
     delete_department,
     change_title_for_department
 )
-from services.utils import is_model_exist_by_name, is_registered_user, is_user_admin
+from services.hierarchy import hierarchy, DepartmentNode
+from filters import IsAdmin
 from keyboards.kb_edit_department import get_keyboard_edit_department
-from database.models import Department, Faculty
 
 router = Router(name="fsm-edit-department-router")
 
@@ -26,16 +25,10 @@ class FSMEditDepartment(StatesGroup):
     input_edit_faculty = State()
 
 
-@router.message(Command("edit_department"))
-async def start_edit_department(
-        msg: types.Message, state: FSMContext, session: AsyncSession
-) -> None:
-    if (
-            await is_registered_user(msg, session=session) and
-            await is_user_admin(msg, session=session)
-    ):
-        await state.set_state(FSMEditDepartment.title)
-        await msg.answer('Введіть назву кафедри.')
+@router.message(Command("edit_department"), IsAdmin())
+async def start_edit_department(msg: types.Message, state: FSMContext) -> None:
+    await state.set_state(FSMEditDepartment.title)
+    await msg.answer('Введіть назву кафедри.')
 
 
 @router.message(FSMEditDepartment.title)
@@ -44,10 +37,8 @@ async def input_title_for_edit_department(
 ) -> None:
     await state.update_data(title=msg.text)
 
-    department_instance: Department = await get_department_instance_by_title(
-        msg.text,
-        session=session
-    )
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    department_instance: DepartmentNode | None = hierarchy_snapshot.department_by_title(msg.text)
     if department_instance:
         await msg.answer(
             f'<b>Інформація про кафедру</b>\n'
@@ -121,11 +112,10 @@ async def input_new_faculty_for_edit_department(
 ) -> None:
     await state.update_data(department_name=msg.text)
 
-    is_exist, faculty_id = await is_model_exist_by_name(
-        msg.text, class_model=Faculty, session=session
-    )
-    if is_exist:
-        data = await state.update_data(new_faculty_id=faculty_id)
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    faculty = hierarchy_snapshot.faculty_by_title(msg.text)
+    if faculty is not None:
+        data = await state.update_data(new_faculty_id=faculty.id)
         await change_faculty_for_department(
             department_id=data['department_id'],
             faculty_id=data['new_faculty_id'],
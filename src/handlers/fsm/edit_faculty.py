@@ -6,13 +6,12 @@ from aiogram.filters import Command
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.admin import (
-    get_faculty_instance_by_title,
     change_title_for_faculty,
     delete_faculty
 )
 from keyboards.kb_edit_faculty import get_keyboard_edit_faculty
-from database.models import Faculty
-from services.utils import is_registered_user, is_user_admin
+from services.hierarchy import hierarchy, FacultyNode
+from filters import IsAdmin
 
 router = Router(name="fsm-edit-faculty-router")
 
@@ -24,16 +23,10 @@ class FSMEditFaculty(StatesGroup):
     input_edit_title_short = State()
 
 
-@router.message(Command("edit_faculty"))
-async def start_edit_faculty(
-        msg: types.Message, state: FSMContext, session: AsyncSession
-) -> None:
-    if (
-            await is_registered_user(msg, session=session) and
-            await is_user_admin(msg, session=session)
-    ):
-        await state.set_state(FSMEditFaculty.title)
-        await msg.answer('Введіть назву факультета.')
+@router.message(Command("edit_faculty"), IsAdmin())
+async def start_edit_faculty(msg: types.Message, state: FSMContext) -> None:
+    await state.set_state(FSMEditFaculty.title)
+    await msg.answer('Введіть назву факультета.')
 
 
 @router.message(FSMEditFaculty.title)
@@ -42,7 +35,8 @@ async def input_title_for_edit_faculty(
 ) -> None:
     await state.update_data(title=msg.text)
 
-    faculty_instance: Faculty = await get_faculty_instance_by_title(msg.text, session=session)
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    faculty_instance: FacultyNode | None = hierarchy_snapshot.faculty_by_title(msg.text)
     if faculty_instance:
         await msg.answer(
             f'<b>Інформація про факультет</b>\n'
@@ -6,15 +6,15 @@ from aiogram.filters import Text, Command
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.admin import (
-    get_group_instance_by_id,
     change_title_for_group,
     delete_group,
     change_url_schedule_for_group,
     change_department_for_group
 )
-from services.utils import is_model_exist_by_name, is_user_admin, is_registered_user
+from services.hierarchy import hierarchy
+from filters import IsAdmin
 from keyboards.kb_edit_group import get_keyboard_edit_group
-from database.models import Department, Group
+from parser.client import ScheduleClient
 
 router = Router(name="fsm-edit-group-router")
 
@@ -28,16 +28,10 @@ class FSMEditGroup(StatesGroup):
     input_edit_schedule_url = State()
 
 
-@router.message(Command("edit_group"))
-async def start_edit_group(
-        msg: types.Message, state: FSMContext, session: AsyncSession
-) -> None:
-    if (
-            await is_registered_user(msg, session=session) and
-            await is_user_admin(msg, session=session)
-    ):
-        await state.set_state(FSMEditGroup.department)
-        await msg.answer('Введіть назву кафедри, до якої належить група.')
+@router.message(Command("edit_group"), IsAdmin())
+async def start_edit_group(msg: types.Message, state: FSMContext) -> None:
+    await state.set_state(FSMEditGroup.department)
+    await msg.answer('Введіть назву кафедри, до якої належить група.')
 
 
 @router.message(FSMEditGroup.department)
@@ -46,12 +40,11 @@ async def input_department_for_edit_group(
 ) -> None:
     await state.update_data(department_name=msg.text)
 
-    is_exist, department_id = await is_model_exist_by_name(
-        msg.text, class_model=Department, session=session
-    )
-    if is_exist:
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    department = hierarchy_snapshot.department_by_title(msg.text)
+    if department is not None:
         await msg.answer('Кафедра з такою назвою існує. Тепер введіть назву групи.')
-        await state.update_data(department_id=department_id)
+        await state.update_data(department_id=department.id)
         await state.set_state(FSMEditGroup.title)
     else:
         await msg.answer('Помилка. Такої кафедри в базі даних не було знайдено.')
@@ -61,16 +54,12 @@ async def input_department_for_edit_group(
 async def input_title_for_edit_group(
         msg: types.Message, state: FSMContext, session: AsyncSession
 ) -> None:
-    await state.update_data(title=msg.text)
+    data = await state.update_data(title=msg.text)
 
-    is_exist, group_id = await is_model_exist_by_name(
-        msg.text, class_model=Group, session=session
-    )
-    if is_exist:
-        data = await state.update_data(group_id=group_id)
-        group = await get_group_instance_by_id(
-            group_id=group_id, department_id=data['department_id'], session=session
-        )
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    group = hierarchy_snapshot.group_by_title(msg.text, department_id=data['department_id'])
+    if group is not None:
+        await state.update_data(group_id=group.id)
         await msg.answer(
             f'<b>Інформація про групу</b>\n'
             f'Факультет: {group.Department.Faculty.title} ({group.Department.Faculty.title_short})\n'
@@ -125,13 +114,15 @@ async def group_edit_callback(
 
 @router.message(FSMEditGroup.input_edit_schedule_url)
 async def input_new_url_schedule_for_edit_group(
-        msg: types.Message, state: FSMContext, session: AsyncSession
+        msg: types.Message, state: FSMContext, session: AsyncSession,
+        schedule_client: ScheduleClient
 ) -> None:
     data = await state.update_data(schedule_url=msg.text)
 
     if data.get('schedule_url', '').startswith('http://epi.kpi.ua'):
         await change_url_schedule_for_group(
-            data['schedule_url'], group_id=data['group_id'], session=session
+            data['schedule_url'], group_id=data['group_id'], session=session,
+            schedule_client=schedule_client
         )
         await msg.answer('Посилання було змінено і розклад скопійовано з сайту.')
         await state.clear()
@@ -160,12 +151,11 @@ async def input_new_department_for_edit_group(
 ):
     await state.update_data(department_name=msg.text)
 
-    is_exist, department_id = await is_model_exist_by_name(
-        msg.text, class_model=Department, session=session
-    )
-    if is_exist:
+    hierarchy_snapshot = await hierarchy.get(session=session)
+    department = hierarchy_snapshot.department_by_title(msg.text)
+    if department is not None:
         data = await state.get_data()
-        data['new_department_id'] = department_id
+        data['new_department_id'] = department.id
         await change_department_for_group(
             data['new_department_id'],
             group_id=data['group_id'],
@@ -4,10 +4,9 @@ from aiogram.fsm.state import State, StatesGroup
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from services.admin import get_groups_instances_by_title
+from services.hierarchy import search_groups_by_title, GroupNode
 from services.other import register_user
 from keyboards.kb_with_groups import get_keyboard_with_groups
-from database.models import Group
 
 router = Router(name="fsm-registration-router")
 
@@ -22,11 +21,17 @@ async def start_registration(msg: types.Message, state: FSMContext) -> None:
     await state.set_state(FSMRegistration.group)
 
 
-@router.message(FSMRegistration.group)
+@router.message(FSMRegistration.group, F.text)
 async def input_name_group(msg: types.Message, state: FSMContext, session: AsyncSession) -> None:
     await state.update_data(group=msg.text)
 
-    groups: list[Group] = await get_groups_instances_by_title(msg.text, session=session)
+    is_exact, groups = await search_groups_by_title(msg.text, session=session)
+    if groups and not is_exact:
+        await msg.answer('<b>Групу з такою назвою не знайдено. Можливо, Ви мали на увазі:</b>',
+                         reply_markup=get_keyboard_with_groups(groups, with_title=True))
+        await state.set_state(FSMRegistration.department)
+        return
+
     match len(groups):
         case 0:
             await msg.answer(
@@ -34,7 +39,7 @@ async def input_name_group(msg: types.Message, state: FSMContext, session: Async
                 'Перевірте відправлений текст на помилки та спробуйте ще раз.'
             )
         case 1:
-            group: Group = groups[0]
+            group: GroupNode = groups[0]
             if await register_user(group.id, user_id=msg.from_user.id, session=session):
                 await msg.answer('Налаштування групи були успішно збережені.')
                 await state.clear()
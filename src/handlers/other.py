@@ -3,10 +3,9 @@ from loguru import logger
 
 from aiogram import types, Bot, Router
 from aiogram.filters import Text
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from handlers.fsm.registration import start_registration
-from services.utils import is_registered_user
+from filters import IsRegistered
 
 router = Router(name="other-commands")
 
@@ -24,14 +23,13 @@ async def set_default_commands(bot: Bot):
     logger.debug("Success set default commands for bot")
 
 
-@router.message(Text)
-async def get_text_messages(
-        msg: types.Message, session: AsyncSession, state: FSMContext
-) -> None:
-    if not await is_registered_user(msg, session=session):
-        await start_registration(msg, state)
-        return
+@router.message(Text, ~IsRegistered())
+async def ask_registration(msg: types.Message, state: FSMContext) -> None:
+    await start_registration(msg, state)
+
 
+@router.message(Text)
+async def get_text_messages(msg: types.Message) -> None:
     match msg.text.lower():
         case 'сайт' | 'site':
             await msg.answer('<a href="http://epi.kpi.ua">Розклад КПІ</a>')
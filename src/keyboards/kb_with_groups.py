@@ -1,18 +1,25 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-from database.models import Group
+from services.hierarchy import GroupNode
 
 
-def get_keyboard_with_groups(groups: list[Group]) -> InlineKeyboardMarkup:
-    keyboard_with_groups = InlineKeyboardMarkup(row_width=2)
+def get_keyboard_with_groups(
+        groups: list[GroupNode], *, with_title: bool = False
+) -> InlineKeyboardMarkup:
+    keyboard_with_groups = InlineKeyboardMarkup(inline_keyboard=[])
     for group in groups:
         keyboard_with_groups.inline_keyboard.append(
             [
                 InlineKeyboardButton(
-                    text=f'{group.Department.title_short} ({group.Department.Faculty.title_short})',
+                    text=_get_button_text(group, with_title),
                     callback_data=f'group select {group.id}'
                 )
             ]
         )
 
     return keyboard_with_groups
+
+
+def _get_button_text(group: GroupNode, with_title: bool) -> str:
+    text = f'{group.Department.title_short} ({group.Department.Faculty.title_short})'
+    return f'{group.title} — {text}' if with_title else text
@@ -6,11 +6,24 @@ from redis.asyncio.client import Redis
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.redis import RedisStorage
 
-from config_loader import load_config_bot, BotConfig, load_config_redis, RedisConfig
+from config_loader import (
+    load_config_bot, BotConfig, load_config_redis, RedisConfig, load_config_refresh, RefreshConfig,
+    load_config_parser, ParserConfig, load_config_cache, CacheConfig,
+    load_config_db, DatabaseConfig, load_config_webhook, load_config_cluster, ClusterConfig,
+    load_config_outbound, load_config_garbage_collector, GarbageCollectorConfig
+)
 from handlers import client, other, admin
 from handlers.fsm import router as router_fsm
-from database.base import sessionmaker_async
-from middlewares import DbSessionMiddleware
+from cluster import ClusterLock, UpdatesFrontend, UpdatesWorker, listen_cache_invalidation
+from database.base import sessionmaker_async, engine, warm_up_pool
+from middlewares import DbSessionMiddleware, UserProfileMiddleware
+from outbound import OutboundQueue, OutboundMiddleware
+from parser.client import ScheduleClient
+from services.cache import schedule_cache, user_profile_cache
+from services.refresh import ScheduleRefresher
+from services.garbage_collector import GarbageCollector
+from services.hierarchy import hierarchy
+from webhook import run_webhook
 
 logs_folder = Path("logs")
 if not logs_folder.exists():
@@ -22,18 +35,35 @@ logger.add('logs/bot.log', rotation='10 MB', compression='zip', enqueue=True, le
 async def main():
     config_bot: BotConfig = load_config_bot()
     bot = Bot(token=config_bot.token, parse_mode='HTML')
+    outbound_queue = OutboundQueue(load_config_outbound())
+    outbound_queue.start()
+    bot.session.middleware(OutboundMiddleware(outbound_queue))
 
     config_redis: RedisConfig = load_config_redis()
-    storage = RedisStorage(
-        Redis(
-            host=config_redis.host,
-            password=config_redis.password,
-            db=config_redis.db,
-            port=config_redis.port,
-        )
+    redis = Redis(
+        host=config_redis.host,
+        password=config_redis.password,
+        db=config_redis.db,
+        port=config_redis.port,
     )
+    storage = RedisStorage(redis)
+
+    config_cache: CacheConfig = load_config_cache()
+    schedule_cache.setup(
+        maxsize=config_cache.schedule_size, ttl=config_cache.schedule_ttl, redis=redis
+    )
+    user_profile_cache.setup(
+        maxsize=config_cache.user_size, ttl=config_cache.user_ttl, redis=redis
+    )
+    hierarchy.setup(redis=redis)
+    config_parser: ParserConfig = load_config_parser()
+    schedule_client = ScheduleClient(config_parser)
+
     dp = Dispatcher(storage=storage)
-    dp.update.middleware(DbSessionMiddleware(session_pool=sessionmaker_async))
+    dp["schedule_client"] = schedule_client
+    db_session_middleware = DbSessionMiddleware(session_pool=sessionmaker_async)
+    dp.update.middleware(db_session_middleware)
+    dp.update.middleware(UserProfileMiddleware())
 
     # including routers
     dp.include_router(router_fsm)
@@ -43,12 +73,53 @@ async def main():
 
     await other.set_default_commands(bot)
 
+    config_cluster: ClusterConfig = load_config_cluster()
+    config_refresh: RefreshConfig = load_config_refresh()
+    config_gc: GarbageCollectorConfig = load_config_garbage_collector()
+    background_tasks = []
+    # Frontend only passes updates to workers, it doesn't handle them
+    if config_bot.mode != 'frontend':
+        background_tasks.append(asyncio.create_task(listen_cache_invalidation(redis)))
+        if config_refresh.enabled:
+            refresh_lock = ClusterLock(redis, 'lock:schedule-refresh', ttl=config_refresh.interval)
+            refresher = ScheduleRefresher(
+                sessionmaker_async, schedule_client, config_refresh, lock=refresh_lock
+            )
+            background_tasks.append(asyncio.create_task(refresher.run_forever()))
+        if config_gc.enabled:
+            gc_lock = ClusterLock(redis, 'lock:garbage-collection', ttl=config_gc.interval)
+            garbage_collector = GarbageCollector(sessionmaker_async, config_gc, lock=gc_lock)
+            background_tasks.append(asyncio.create_task(garbage_collector.run_forever()))
+
+        config_db: DatabaseConfig = load_config_db()
+        if config_db.pool_warm_up:
+            await warm_up_pool(engine, config_db.pool_size)
+        async with sessionmaker_async() as session:
+            await hierarchy.reload(session=session)
+
     try:
-        await bot.delete_webhook(drop_pending_updates=True)
-        await dp.start_polling(bot)
+        match config_bot.mode:
+            case 'webhook':
+                await run_webhook(dp, bot, load_config_webhook())
+            case 'frontend':
+                await bot.delete_webhook()
+                frontend = UpdatesFrontend(redis, config_cluster)
+                await frontend.run_polling(bot, dp.resolve_used_update_types())
+            case 'worker':
+                await UpdatesWorker(redis, config_cluster).run(dp, bot)
+            case _:
+                await bot.delete_webhook(drop_pending_updates=True)
+                await dp.start_polling(bot)
     finally:
+        for task in background_tasks:
+            task.cancel()
+        logger.info(f'Database sessions of handled updates: {db_session_middleware.stats}')
+        logger.info(f'Outbound requests to chats: {outbound_queue.stats}')
+        await outbound_queue.close()
+        await schedule_client.close()
         await dp.storage.close()
         await bot.session.close()
+        await engine.dispose()
         await logger.complete()
 
 
@@ -1 +1,2 @@
-from middlewares.db import DbSessionMiddleware
+from middlewares.db import DbSessionMiddleware, LazySession, SessionStats
+from middlewares.profile import UserProfileMiddleware
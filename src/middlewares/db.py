@@ -1,14 +1,54 @@
-from typing import Callable, Awaitable, Dict, Any
+from typing import Callable, Awaitable, Dict, Any, NamedTuple
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+
+class SessionStats(NamedTuple):
+    updates: int
+    sessions_opened: int
+
+    @property
+    def updates_without_session(self) -> int:
+        return self.updates - self.sessions_opened
+
+
+class LazySession:
+    """
+    Proxy of AsyncSession, which opens session only on first use.
+    Updates handled without database don't take session and connection from pool.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker):
+        self._session_pool = session_pool
+        self._session: AsyncSession | None = None
+
+    @property
+    def is_opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_pool()
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
 
 
 class DbSessionMiddleware(BaseMiddleware):
     def __init__(self, session_pool: async_sessionmaker):
         super().__init__()
         self.session_pool = session_pool
+        self._updates = 0
+        self._sessions_opened = 0
+
+    @property
+    def stats(self) -> SessionStats:
+        """Count of handled updates and updates, which opened session"""
+        return SessionStats(updates=self._updates, sessions_opened=self._sessions_opened)
 
     async def __call__(
             self,
@@ -16,6 +56,12 @@ class DbSessionMiddleware(BaseMiddleware):
             event: TelegramObject,
             data: Dict[str, Any],
     ) -> Any:
-        async with self.session_pool() as session:
-            data["session"] = session
+        session = LazySession(self.session_pool)
+        data["session"] = session
+        self._updates += 1
+        try:
             return await handler(event, data)
+        finally:
+            if session.is_opened:
+                self._sessions_opened += 1
+            await session.close()
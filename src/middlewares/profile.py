@@ -0,0 +1,23 @@
+from typing import Callable, Awaitable, Dict, Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from services.utils import get_user_profile
+
+
+class UserProfileMiddleware(BaseMiddleware):
+    """Resolve profile of user once per update, must be chained after DbSessionMiddleware"""
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        from_user: User | None = data.get("event_from_user")
+        data["user"] = (
+            await get_user_profile(from_user.id, session=data["session"])
+            if from_user is not None else None
+        )
+        return await handler(event, data)
@@ -0,0 +1,63 @@
+"""lesson natural keys
+
+Revision ID: 20749cb110db
+Revises: 3e25b5b80864
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20749cb110db'
+down_revision = '3e25b5b80864'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Duplicate lessons could be created by concurrent get_or_create calls,
+    # so merge them into the oldest row before adding the unique constraint.
+    op.execute("""
+        CREATE TEMPORARY TABLE _lesson_duplicates ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, min(id) OVER (
+                PARTITION BY discipline_id, week, day, number_lesson
+            ) AS keep_id
+            FROM bot_lessons
+        ) AS ranked
+        WHERE id <> keep_id
+    """)
+    op.execute("""
+        UPDATE lesson_group SET lesson_id = d.keep_id
+        FROM _lesson_duplicates AS d WHERE lesson_group.lesson_id = d.id
+    """)
+    op.execute("""
+        UPDATE lesson_teacher SET lesson_id = d.keep_id
+        FROM _lesson_duplicates AS d WHERE lesson_teacher.lesson_id = d.id
+    """)
+    op.execute("DELETE FROM bot_lessons WHERE id IN (SELECT id FROM _lesson_duplicates)")
+    op.create_unique_constraint(
+        '_lesson_discipline_week_day_number_uc', 'bot_lessons',
+        ['discipline_id', 'week', 'day', 'number_lesson']
+    )
+
+    for table, column in (('lesson_group', 'group_id'), ('lesson_teacher', 'teacher_id')):
+        op.execute(f'DELETE FROM {table} WHERE lesson_id IS NULL OR {column} IS NULL')
+        op.execute(f"""
+            DELETE FROM {table} AS a USING {table} AS b
+            WHERE a.ctid < b.ctid AND a.lesson_id = b.lesson_id AND a.{column} = b.{column}
+        """)
+        op.alter_column(table, 'lesson_id', existing_type=sa.Integer(), nullable=False)
+        op.alter_column(table, column, existing_type=sa.Integer(), nullable=False)
+        op.create_primary_key(f'{table}_pkey', table, ['lesson_id', column])
+
+
+def downgrade() -> None:
+    for table, column in (('lesson_group', 'group_id'), ('lesson_teacher', 'teacher_id')):
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.alter_column(table, 'lesson_id', existing_type=sa.Integer(), nullable=True)
+        op.alter_column(table, column, existing_type=sa.Integer(), nullable=True)
+
+    op.drop_constraint('_lesson_discipline_week_day_number_uc', 'bot_lessons', type_='unique')
@@ -0,0 +1,41 @@
+"""cascade deletes
+
+Revision ID: 7db8ecaa84d3
+Revises: b56472338ff3
+Create Date: 2026-10-18 20:11:42.905173
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7db8ecaa84d3'
+down_revision = 'b56472338ff3'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table), constraints have default names given by PostgreSQL
+cascade_foreign_keys = (
+    ('bot_departments', 'faculty_id', 'bot_faculties'),
+    ('bot_groups', 'department_id', 'bot_departments'),
+    ('bot_users', 'group_id', 'bot_groups'),
+    ('bot_tasks', 'user_id', 'bot_users'),
+    ('lesson_group', 'group_id', 'bot_groups'),
+    ('lesson_group', 'lesson_id', 'bot_lessons'),
+    ('lesson_teacher', 'lesson_id', 'bot_lessons'),
+)
+
+
+def _recreate_foreign_keys(ondelete: str | None) -> None:
+    for table, column, referred_table in cascade_foreign_keys:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred_table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    _recreate_foreign_keys(None)
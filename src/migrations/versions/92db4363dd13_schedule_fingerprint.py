@@ -0,0 +1,30 @@
+"""schedule fingerprint
+
+Revision ID: 92db4363dd13
+Revises: 20749cb110db
+Create Date: 2026-10-18 11:04:27.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '92db4363dd13'
+down_revision = '20749cb110db'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bot_groups', sa.Column('schedule_etag', sa.String(length=200), nullable=True))
+    op.add_column(
+        'bot_groups', sa.Column('schedule_last_modified', sa.String(length=50), nullable=True)
+    )
+    op.add_column('bot_groups', sa.Column('schedule_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('bot_groups', 'schedule_hash')
+    op.drop_column('bot_groups', 'schedule_last_modified')
+    op.drop_column('bot_groups', 'schedule_etag')
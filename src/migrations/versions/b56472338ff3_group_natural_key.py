@@ -0,0 +1,28 @@
+"""group natural key
+
+Revision ID: b56472338ff3
+Revises: beab4f2f9160
+Create Date: 2026-10-18 19:24:07.518306
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b56472338ff3'
+down_revision = 'beab4f2f9160'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Model has unique title in department, upsert of groups conflicts on this constraint
+    op.drop_constraint('bot_groups_title_key', 'bot_groups', type_='unique')
+    op.create_unique_constraint(
+        '_department_id_title_str_uc', 'bot_groups', ['department_id', 'title']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('_department_id_title_str_uc', 'bot_groups', type_='unique')
+    op.create_unique_constraint('bot_groups_title_key', 'bot_groups', ['title'])
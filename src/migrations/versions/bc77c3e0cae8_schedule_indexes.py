@@ -0,0 +1,38 @@
+"""schedule indexes
+
+Revision ID: bc77c3e0cae8
+Revises: 92db4363dd13
+Create Date: 2026-10-18 14:21:08.417592
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'bc77c3e0cae8'
+down_revision = '92db4363dd13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Primary keys of association tables are created by 20749cb110db
+    op.create_index(
+        'ix_lesson_group_group_id_lesson_id', 'lesson_group', ['group_id', 'lesson_id']
+    )
+    op.create_index('ix_lesson_teacher_teacher_id', 'lesson_teacher', ['teacher_id'])
+    op.create_index(
+        'ix_bot_lessons_week_day_number_lesson', 'bot_lessons', ['week', 'day', 'number_lesson']
+    )
+    op.create_index('ix_bot_groups_title', 'bot_groups', ['title'])
+    op.create_index('ix_bot_users_group_id', 'bot_users', ['group_id'])
+    op.create_index('ix_bot_departments_faculty_id', 'bot_departments', ['faculty_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bot_departments_faculty_id', table_name='bot_departments')
+    op.drop_index('ix_bot_users_group_id', table_name='bot_users')
+    op.drop_index('ix_bot_groups_title', table_name='bot_groups')
+    op.drop_index('ix_bot_lessons_week_day_number_lesson', table_name='bot_lessons')
+    op.drop_index('ix_lesson_teacher_teacher_id', table_name='lesson_teacher')
+    op.drop_index('ix_lesson_group_group_id_lesson_id', table_name='lesson_group')
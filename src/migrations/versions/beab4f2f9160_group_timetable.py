@@ -0,0 +1,57 @@
+"""group timetable
+
+Revision ID: beab4f2f9160
+Revises: bc77c3e0cae8
+Create Date: 2026-10-18 16:02:51.734120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'beab4f2f9160'
+down_revision = 'bc77c3e0cae8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'group_timetable',
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('week', sa.Integer(), nullable=False),
+        sa.Column('group_title', sa.String(length=10), nullable=True),
+        sa.Column('lessons', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(['group_id'], ['bot_groups.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('group_id', 'week')
+    )
+    # Same statement as services.timetable uses for one group, applied to all groups
+    op.execute("""
+        INSERT INTO group_timetable (group_id, week, group_title, lessons)
+        SELECT g.id, w.week, g.title, coalesce(
+            jsonb_agg(
+                jsonb_build_array(
+                    l.day, l.number_lesson, d.title, coalesce(t.teachers, '[]'::jsonb),
+                    l.type_and_location
+                ) ORDER BY l.day, l.number_lesson, l.id
+            ) FILTER (WHERE l.id IS NOT NULL),
+            '[]'::jsonb
+        )
+        FROM bot_groups AS g
+        CROSS JOIN (VALUES (1), (2)) AS w (week)
+        LEFT JOIN lesson_group AS lg ON lg.group_id = g.id
+        LEFT JOIN bot_lessons AS l ON l.id = lg.lesson_id AND l.week = w.week
+        LEFT JOIN bot_disciplines AS d ON d.id = l.discipline_id
+        LEFT JOIN LATERAL (
+            SELECT jsonb_agg(bt.full_name ORDER BY bt.id) AS teachers
+            FROM lesson_teacher AS lt JOIN bot_teachers AS bt ON bt.id = lt.teacher_id
+            WHERE lt.lesson_id = l.id
+        ) AS t ON true
+        GROUP BY g.id, w.week, g.title
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('group_timetable')
@@ -0,0 +1,3 @@
+from outbound.buckets import TokenBucket
+from outbound.queue import OutboundQueue, OutboundStats, Priority, bulk_sends
+from outbound.middleware import OutboundMiddleware
@@ -0,0 +1,41 @@
+import asyncio
+
+
+class TokenBucket:
+    """Allow bursts up to `capacity` requests, tokens are refilled with `rate` per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = asyncio.get_running_loop().time()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until token can be taken"""
+        now = asyncio.get_running_loop().time()
+        self._refill(now)
+        return max(0.0, self._updated + max(0.0, 1 - self._tokens) / self.rate - now)
+
+    def delay_until_full(self) -> float:
+        """Seconds until bucket is full and its state can be forgotten"""
+        now = asyncio.get_running_loop().time()
+        self._refill(now)
+        return max(0.0, self._updated + (self.capacity - self._tokens) / self.rate - now)
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+    async def acquire(self) -> None:
+        while (delay := self.delay()) > 0:
+            await asyncio.sleep(delay)
+        self.take()
+
+    def block(self, seconds: float) -> None:
+        """Pause bucket for `seconds`, after pause one token is available and refill is resumed"""
+        self._tokens = 1
+        self._updated = max(self._updated, asyncio.get_running_loop().time() + seconds)
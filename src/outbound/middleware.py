@@ -0,0 +1,25 @@
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware, NextRequestMiddlewareType
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from outbound.queue import OutboundQueue
+
+
+class OutboundMiddleware(BaseRequestMiddleware):
+    """Pass requests to chats through outbound queue, other requests are made immediately"""
+
+    def __init__(self, queue: OutboundQueue):
+        self.queue = queue
+
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType[TelegramType],
+            bot: Bot,
+            method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if getattr(method, 'chat_id', None) is None:
+            return await make_request(bot, method)
+        return await self.queue.submit(make_request, bot, method)
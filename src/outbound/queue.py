@@ -0,0 +1,222 @@
+import asyncio
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, NamedTuple, Iterator
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from loguru import logger
+
+from config_loader import OutboundConfig
+from outbound.buckets import TokenBucket
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BULK = 1
+
+
+_send_priority: ContextVar[Priority] = ContextVar('send_priority', default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends() -> Iterator[None]:
+    """Requests to chats made inside block are sent after interactive replies"""
+    token = _send_priority.set(Priority.BULK)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class OutboundStats(NamedTuple):
+    queued: int
+    in_flight: int
+    sent: int
+    retried: int
+    failed: int
+    latency_avg: float
+    latency_max: float
+
+
+class _Request:
+    __slots__ = ('make_request', 'bot', 'method', 'priority', 'future', 'submitted', 'retries')
+
+    def __init__(
+            self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod,
+            priority: Priority
+    ):
+        loop = asyncio.get_running_loop()
+        self.make_request = make_request
+        self.bot = bot
+        self.method = method
+        self.priority = priority
+        self.future: asyncio.Future[Response] = loop.create_future()
+        self.submitted = loop.time()
+        self.retries = 0
+
+
+class _ChatLane:
+    """Requests to one chat, they are sent one by one in order of submitting"""
+    __slots__ = ('bucket', 'requests', 'scheduled')
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.requests: deque[_Request] = deque()
+        self.scheduled = False
+
+
+class OutboundQueue:
+    """
+    Send requests to chats within limits of Telegram: global rate and rate of every chat.
+    Chats, which have requests and free token, are served by senders in order of priority,
+    flood control errors pause chat for `retry_after` and request is retried.
+    """
+
+    def __init__(self, config: OutboundConfig):
+        self.config = config
+        self._global_bucket: TokenBucket | None = None
+        self._lanes: dict[int | str, _ChatLane] = {}
+        self._ready: asyncio.PriorityQueue[tuple[Priority, int, int | str]] | None = None
+        self._sequence = itertools.count()
+        self._senders: list[asyncio.Task] = []
+        self._queued = self._in_flight = self._sent = self._retried = self._failed = 0
+        self._latency_sum = self._latency_max = 0.0
+
+    @property
+    def stats(self) -> OutboundStats:
+        """Depth of queue, counts of requests and latency from submitting to response"""
+        done = self._sent + self._failed
+        return OutboundStats(
+            queued=self._queued, in_flight=self._in_flight, sent=self._sent,
+            retried=self._retried, failed=self._failed,
+            latency_avg=self._latency_sum / done if done else 0.0, latency_max=self._latency_max
+        )
+
+    def start(self) -> None:
+        self._global_bucket = TokenBucket(self.config.global_rate, self.config.global_rate)
+        self._ready = asyncio.PriorityQueue()
+        self._senders = [
+            asyncio.create_task(self._run_sender()) for _ in range(self.config.senders)
+        ]
+
+    async def close(self) -> None:
+        for sender in self._senders:
+            sender.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+        for lane in self._lanes.values():
+            for request in lane.requests:
+                request.future.cancel()
+        self._lanes.clear()
+
+    async def submit(
+            self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod
+    ) -> Response:
+        chat_id = method.chat_id
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = _ChatLane(self._make_chat_bucket(chat_id))
+
+        request = _Request(make_request, bot, method, _send_priority.get())
+        lane.requests.append(request)
+        self._queued += 1
+        if not lane.scheduled:
+            lane.scheduled = True
+            self._schedule(chat_id, lane)
+        return await request.future
+
+    def _make_chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        # Groups and channels have negative id or username
+        is_private = isinstance(chat_id, int) and chat_id > 0
+        rate = self.config.chat_rate if is_private else self.config.group_rate
+        return TokenBucket(rate, self.config.chat_burst)
+
+    def _schedule(self, chat_id: int | str, lane: _ChatLane) -> None:
+        delay = lane.bucket.delay()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._push, chat_id, lane)
+        else:
+            self._push(chat_id, lane)
+
+    def _push(self, chat_id: int | str, lane: _ChatLane) -> None:
+        priority = lane.requests[0].priority if lane.requests else Priority.INTERACTIVE
+        self._ready.put_nowait((priority, next(self._sequence), chat_id))
+
+    def _release(self, chat_id: int | str, lane: _ChatLane) -> None:
+        if lane.requests:
+            self._schedule(chat_id, lane)
+            return
+        lane.scheduled = False
+        # State of chat is kept until its bucket is full, otherwise limit could be bypassed
+        asyncio.get_running_loop().call_later(
+            lane.bucket.delay_until_full(), self._forget_lane, chat_id, lane
+        )
+
+    def _forget_lane(self, chat_id: int | str, lane: _ChatLane) -> None:
+        if not lane.scheduled and self._lanes.get(chat_id) is lane:
+            del self._lanes[chat_id]
+
+    async def _run_sender(self) -> None:
+        while True:
+            _, _, chat_id = await self._ready.get()
+            lane = self._lanes[chat_id]
+            # Chat could be paused by flood control after it was scheduled
+            if lane.bucket.delay() > 0:
+                self._schedule(chat_id, lane)
+                continue
+
+            while lane.requests and lane.requests[0].future.done():
+                lane.requests.popleft()  # caller has been cancelled
+                self._queued -= 1
+            if not lane.requests:
+                self._release(chat_id, lane)
+                continue
+
+            await self._global_bucket.acquire()
+            lane.bucket.take()
+            request = lane.requests.popleft()
+            self._queued -= 1
+            self._in_flight += 1
+            try:
+                await self._send(lane, request)
+            finally:
+                self._in_flight -= 1
+                self._release(chat_id, lane)
+
+    async def _send(self, lane: _ChatLane, request: _Request) -> None:
+        try:
+            response = await request.make_request(request.bot, request.method)
+        except TelegramRetryAfter as error:
+            lane.bucket.block(error.retry_after)
+            if request.retries < self.config.max_retries and not request.future.done():
+                logger.warning(f'Flood control, request is retried: {error.message}')
+                request.retries += 1
+                self._retried += 1
+                lane.requests.appendleft(request)
+                self._queued += 1
+                return
+            self._finish(request, error=error)
+        except Exception as error:
+            self._finish(request, error=error)
+        else:
+            self._finish(request, response=response)
+
+    def _finish(
+            self, request: _Request, *, response: Any = None, error: Exception | None = None
+    ) -> None:
+        latency = asyncio.get_running_loop().time() - request.submitted
+        self._latency_sum += latency
+        self._latency_max = max(self._latency_max, latency)
+        if error is not None:
+            self._failed += 1
+            if not request.future.done():
+                request.future.set_exception(error)
+        else:
+            self._sent += 1
+            if not request.future.done():
+                request.future.set_result(response)
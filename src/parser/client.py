@@ -0,0 +1,92 @@
+from typing import NamedTuple
+
+import aiohttp
+
+from config_loader import load_config_parser, ParserConfig
+from parser.executor import ParserExecutor
+
+_headers = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:105.0) Gecko/20100101 Firefox/105.0'
+}
+
+
+class PageResponse(NamedTuple):
+    not_modified: bool
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+
+
+class ScheduleClient:
+    """
+    Long-lived HTTP client for schedule site.
+    Owns one aiohttp session, so connections and resolved DNS are reused between requests,
+    and executor for parsing of fetched pages.
+    """
+
+    def __init__(self, config: ParserConfig | None = None):
+        self.config = config or load_config_parser()
+        self.executor = ParserExecutor(self.config.executor, self.config.workers)
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Session is created lazily, because it must be bound to running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.config.limit_per_host,
+                keepalive_timeout=self.config.keepalive_timeout,
+                ttl_dns_cache=self.config.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=_headers,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+            )
+        return self._session
+
+    async def fetch(self, url: str) -> bytes:
+        """Get body of page by url"""
+        page = await self.fetch_if_modified(url)
+        return page.body
+
+    async def fetch_if_modified(
+            self, url: str, *, etag: str | None = None, last_modified: str | None = None
+    ) -> PageResponse:
+        """
+        Get page by url with conditional request if validators of previous response are known.
+        Error status raises ClientResponseError, so error page is never taken for schedule
+        """
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+
+        async with self.session.get(url, allow_redirects=True, headers=headers) as response:
+            if response.status == 304:
+                return PageResponse(
+                    not_modified=True,
+                    body=b'',
+                    etag=response.headers.get('ETag', etag),
+                    last_modified=response.headers.get('Last-Modified', last_modified),
+                )
+            response.raise_for_status()
+            return PageResponse(
+                not_modified=False,
+                body=await response.read(),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self.executor.shutdown()
+
+    async def __aenter__(self) -> 'ScheduleClient':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
@@ -8,3 +8,15 @@ class LessonTuple(NamedTuple):
     week: int
     day_number: int
     lesson_number: int
+
+
+class ScheduleFingerprint(NamedTuple):
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str | None = None
+
+
+class ScheduleFetch(NamedTuple):
+    lessons: list[LessonTuple] | None
+    fingerprint: ScheduleFingerprint
+    modified: bool
@@ -0,0 +1,87 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import Callable, NamedTuple, TypeVar, Any
+
+_T = TypeVar('_T')
+
+
+class ParserStats(NamedTuple):
+    calls: int
+    pool_seconds: float
+    wait_seconds: float
+    loop_seconds: float
+
+
+class ParserExecutor:
+    """
+    Run CPU-bound parsing of pages out of event loop.
+    Kind of executor is process, thread (lxml releases GIL while parsing) or none,
+    in the last case function is called right on event loop.
+    """
+
+    def __init__(self, kind: str = 'process', workers: int = 2):
+        if kind not in ('process', 'thread', 'none'):
+            raise ValueError(f'Unknown kind of parser executor: {kind}')
+
+        self.kind = kind
+        self.workers = workers
+        self._executor: Executor | None = None
+        self._calls = 0
+        self._pool_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._loop_seconds = 0.0
+
+    @property
+    def stats(self) -> ParserStats:
+        """Time spent in pool by workers, awaited by event loop and spent on event loop"""
+        return ParserStats(
+            calls=self._calls,
+            pool_seconds=self._pool_seconds,
+            wait_seconds=self._wait_seconds,
+            loop_seconds=self._loop_seconds,
+        )
+
+    async def run(self, func: Callable[..., _T], *args: Any) -> _T:
+        self._calls += 1
+        time_start = perf_counter()
+
+        if self.kind == 'none':
+            result = func(*args)
+            self._loop_seconds += perf_counter() - time_start
+            return result
+
+        loop = asyncio.get_running_loop()
+        result, elapsed = await loop.run_in_executor(
+            self._get_executor(), partial(_timed_call, func, *args)
+        )
+        self._pool_seconds += elapsed
+        self._wait_seconds += perf_counter() - time_start
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        # Pool is started on first use, so short-lived clients don't spawn processes
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='parser'
+                )
+        return self._executor
+
+
+def _timed_call(func: Callable[..., _T], *args: Any) -> (_T, float):
+    """Call function in worker and measure time of its work"""
+    time_start = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - time_start
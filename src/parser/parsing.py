@@ -1,25 +1,101 @@
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
+import hashlib
+from bs4 import BeautifulSoup, UnicodeDammit
+from lxml import etree, html as lxml_html
 from time import time
 from pprint import pprint
 
-from parser.datatypes import LessonTuple
+from config_loader import load_config_parser
+from parser.client import ScheduleClient
+from parser.datatypes import LessonTuple, ScheduleFingerprint, ScheduleFetch
 
 _unknown_field = "Немає інформації"
 _set_days_of_week = {"Понеділок", "Вівторок", "Середа", "Четвер", "П'ятниця", "Субота"}
-_headers = {
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:105.0) Gecko/20100101 Firefox/105.0'
-}
 
+_xpath_tables = etree.XPath('//table')
+_xpath_trs = etree.XPath('.//tr')
+_xpath_tds = etree.XPath('.//td')
+_xpath_has_dis_label = etree.XPath(
+    'boolean(.//span[contains(concat(" ", normalize-space(@class), " "), " disLabel ")])'
+)
+_xpath_plain_links = etree.XPath(
+    './/a[contains(concat(" ", normalize-space(@class), " "), " plainLink ")]'
+)
+
+
+async def parse_schedule_tables(
+        url: str, *, client: ScheduleClient | None = None
+) -> list[LessonTuple]:
+    """
+    Use for parsing schedule tables from http://epi.kpi.ua.
+    Pass long-lived client to reuse its connections, otherwise temporary one is created.
+    """
+    schedule = await fetch_schedule_tables(url, client=client)
+    return schedule.lessons
+
+
+async def fetch_schedule_tables(
+        url: str, *, fingerprint: ScheduleFingerprint | None = None,
+        client: ScheduleClient | None = None
+) -> ScheduleFetch:
+    """
+    Fetch and parse schedule tables, if it was changed since fingerprint of previous fetch.
+    Conditional request is sent when server gave validators before, otherwise hash of
+    tables html is compared. Lessons are None when schedule is not modified.
+    """
+    fingerprint = fingerprint or ScheduleFingerprint()
+    if client is None:
+        # Thread is enough for single page, temporary pool of processes costs more
+        config_parser = load_config_parser()._replace(executor='thread')
+        async with ScheduleClient(config_parser) as client:
+            return await _fetch_schedule_tables(url, fingerprint, client)
+
+    return await _fetch_schedule_tables(url, fingerprint, client)
+
+
+async def _fetch_schedule_tables(
+        url: str, fingerprint: ScheduleFingerprint, client: ScheduleClient
+) -> ScheduleFetch:
+    page = await client.fetch_if_modified(
+        url, etag=fingerprint.etag, last_modified=fingerprint.last_modified
+    )
+
+    if page.not_modified:
+        return ScheduleFetch(
+            lessons=None,
+            fingerprint=fingerprint._replace(etag=page.etag, last_modified=page.last_modified),
+            modified=False
+        )
+
+    new_fingerprint = ScheduleFingerprint(
+        etag=page.etag,
+        last_modified=page.last_modified,
+        content_hash=_get_tables_hash(page.body)
+    )
+    if new_fingerprint.content_hash == fingerprint.content_hash:
+        return ScheduleFetch(lessons=None, fingerprint=new_fingerprint, modified=False)
+
+    return ScheduleFetch(
+        lessons=await client.executor.run(parse_lessons, page.body, client.config.backend),
+        fingerprint=new_fingerprint,
+        modified=True
+    )
+
+
+def _get_tables_hash(data: bytes) -> str:
+    """Hash of html with schedule tables, rest of page (e.g. ASP.NET view state) is ignored"""
+    start, end = data.find(b'<table'), data.rfind(b'</table>')
+    tables = data[start:end] if start != -1 and end != -1 else data
+    return hashlib.sha256(tables).hexdigest()
+
+
+def parse_lessons(data: bytes, backend: str = 'lxml') -> list[LessonTuple]:
+    """Parse lessons from html of schedule page with backend by name (bs4 or lxml)"""
+    return _parsing_backends[backend](data)
 
-async def parse_schedule_tables(url: str) -> list[LessonTuple]:
-    """Use for parsing schedule tables from http://epi.kpi.ua"""
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, allow_redirects=True, headers=_headers) as response:
-            data = await response.read()
 
+def _parse_lessons_bs4(data: bytes) -> list[LessonTuple]:
+    """Parse lessons from html of schedule page with BeautifulSoup"""
     soup = BeautifulSoup(data, "lxml")
 
     tables = soup.find_all("table")
@@ -57,22 +133,72 @@ async def parse_schedule_tables(url: str) -> list[LessonTuple]:
                     elif 'http://wiki.kpi.ua/' in href:
                         disciplines.append(tag_a.get('title'))
 
-                sort_lessons = _sort_lesson(disciplines, teachers, locations)
+                lessons.extend(_make_lessons(
+                    disciplines, teachers, locations, week_number, day_number, lesson_number
+                ))
+
+    return lessons
+
+
+def _parse_lessons_lxml(data: bytes) -> list[LessonTuple]:
+    """Parse lessons from html of schedule page with compiled XPath over lxml tree"""
+    root = lxml_html.document_fromstring(_decode_html(data))
+
+    lessons = []
+
+    for week_number, table in enumerate(_xpath_tables(root), 1):
+        for lesson_number, tr in enumerate(_xpath_trs(table)):
+            for day_number, td in enumerate(_xpath_tds(tr)):
+                if not _xpath_has_dis_label(td) or td.text_content().strip() in _set_days_of_week:
+                    continue
+
+                teachers = []
+                disciplines = []
+                locations = []
+
+                for tag_a in _xpath_plain_links(td):
+                    href = tag_a.get('href')
 
-                for lesson in sort_lessons:
-                    data = LessonTuple(
-                        discipline=lesson.get('discipline', _unknown_field),
-                        teachers=lesson.get('teacher', []),
-                        location=lesson.get('location', _unknown_field),
-                        day_number=day_number,
-                        week=week_number,
-                        lesson_number=lesson_number
-                    )
-                    lessons.append(data)
+                    if '/Schedules/ViewSchedule.aspx' in href:
+                        teachers.append(tag_a.get('title'))
+                    elif 'http://maps.google.com' in href:
+                        locations.append(tag_a.text_content())
+                    elif 'http://wiki.kpi.ua/' in href:
+                        disciplines.append(tag_a.get('title'))
+
+                lessons.extend(_make_lessons(
+                    disciplines, teachers, locations, week_number, day_number, lesson_number
+                ))
 
     return lessons
 
 
+def _decode_html(data: bytes) -> str:
+    """Decode page as BeautifulSoup does, schedule site uses utf-8"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return UnicodeDammit(data, is_html=True).unicode_markup
+
+
+def _make_lessons(
+        disciplines: list[str], teachers: list[str], locations: list[str],
+        week_number: int, day_number: int, lesson_number: int
+) -> list[LessonTuple]:
+    """Make lessons tuples from links found in one cell of schedule table"""
+    return [
+        LessonTuple(
+            discipline=lesson.get('discipline', _unknown_field),
+            teachers=lesson.get('teacher', []),
+            location=lesson.get('location', _unknown_field),
+            day_number=day_number,
+            week=week_number,
+            lesson_number=lesson_number
+        )
+        for lesson in _sort_lesson(disciplines, teachers, locations)
+    ]
+
+
 def _sort_lesson(
         disciplines: list[str], teachers: list[str], locations: list[str]
 ) -> list[dict[str, str]]:
@@ -128,26 +254,36 @@ def _slice_teachers_names(teachers: list[str]) -> list[str]:
     return sliced_names
 
 
+_parsing_backends = {
+    'bs4': _parse_lessons_bs4,
+    'lxml': _parse_lessons_lxml,
+}
+
+
 async def main():
     time_start = time()
-    # ЛА-п11
-    lap11 = await parse_schedule_tables(
-        'http://epi.kpi.ua/Schedules/ViewSchedule.aspx?g=f761eeb5-f6a2-4019-9d18-6647bd6daa23'
-    )
-    pprint(lap11)
-    print(f'Всього пар: {len(lap11)}')
-    # ЛА-91
-    la91 = await parse_schedule_tables(
-        'http://epi.kpi.ua/Schedules/ViewSchedule.aspx?g=81b68054-0171-4aa6-847e-80a78584638d'
-    )
-    pprint(la91)
-    print(f'Всього пар: {len(la91)}')
-    # ЛА-п21
-    lap21 = await parse_schedule_tables(
-        'http://epi.kpi.ua/Schedules/ViewSchedule.aspx?g=4439a805-5bb5-4e80-8755-fcde49fdf47b'
-    )
-    pprint(lap21)
-    print(f'Всього пар: {len(lap21)}')
+    async with ScheduleClient() as client:
+        # ЛА-п11
+        lap11 = await parse_schedule_tables(
+            'http://epi.kpi.ua/Schedules/ViewSchedule.aspx?g=f761eeb5-f6a2-4019-9d18-6647bd6daa23',
+            client=client
+        )
+        pprint(lap11)
+        print(f'Всього пар: {len(lap11)}')
+        # ЛА-91
+        la91 = await parse_schedule_tables(
+            'http://epi.kpi.ua/Schedules/ViewSchedule.aspx?g=81b68054-0171-4aa6-847e-80a78584638d',
+            client=client
+        )
+        pprint(la91)
+        print(f'Всього пар: {len(la91)}')
+        # ЛА-п21
+        lap21 = await parse_schedule_tables(
+            'http://epi.kpi.ua/Schedules/ViewSchedule.aspx?g=4439a805-5bb5-4e80-8755-fcde49fdf47b',
+            client=client
+        )
+        pprint(lap21)
+        print(f'Всього пар: {len(lap21)}')
 
     print(f'Пройшло {time() - time_start} секунд')
 
@@ -1,15 +1,35 @@
+import asyncio
+from typing import NamedTuple
+
 from loguru import logger
 
-from sqlalchemy import select, update, delete, text
+import aiohttp
+from sqlalchemy import (
+    select, update, delete, text, func, literal, Delete, Select, ColumnElement
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
-from aiohttp.client_exceptions import ClientConnectorError
 
-from database.models import User, Faculty, Department, Group, Discipline, Lesson, Teacher
-from parser.parsing import parse_schedule_tables
-from parser.datatypes import LessonTuple
-from services.utils import get_or_create
+from database.models import (
+    User, Faculty, Department, Group, GroupTimetable, Lesson, lesson_group
+)
+from parser.client import ScheduleClient
+from parser.parsing import fetch_schedule_tables
+from parser.datatypes import ScheduleFetch
+from services.utils import upsert
+from services.cache import schedule_cache, user_profile_cache
+from services.hierarchy import hierarchy
+from services.ingestion import ingest_schedule, save_schedule_fingerprint
+from services.timetable import rebuild_group_timetable
+
+
+class DeletionReport(NamedTuple):
+    faculties: int
+    departments: int
+    groups: int
+    users: int
+    lessons: int
 
 
 async def try_register_first_admin(*, user_id: int, session: AsyncSession) -> bool:
@@ -20,83 +40,52 @@ async def try_register_first_admin(*, user_id: int, session: AsyncSession) -> bo
 
     if admin_user is None:
         try:
-            await session.merge(User(id=user_id, is_admin=True))
+            await upsert(
+                User, {'id': user_id, 'is_admin': True}, update=('is_admin',), session=session
+            )
             await session.commit()
         except SQLAlchemyError:
             logger.exception('Failed try register first admin')
             return False
         else:
+            await user_profile_cache.invalidate(user_id)
             return True
 
     return False
 
 
 async def add_information_from_schedule_to_db(
-        group_instance: Group, *, session: AsyncSession
+        group_instance: Group, *, session: AsyncSession,
+        schedule_client: ScheduleClient | None = None
 ) -> bool:
     """Added information from schedule to database tables"""
     try:
-        schedule_lessons_tuple: list[LessonTuple] = await parse_schedule_tables(
-            group_instance.schedule_url
+        schedule: ScheduleFetch = await fetch_schedule_tables(
+            group_instance.schedule_url, client=schedule_client
         )
-    except ClientConnectorError:
-        logger.warning('Failed try get schedule from site')
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        logger.warning(f'Failed try get schedule of {group_instance} from site: {error!r}')
         return False
 
-    for lesson in schedule_lessons_tuple:
-        discipline_title, teachers, location, week, day_number, lesson_number = (
-            lesson.discipline, lesson.teachers, lesson.location, lesson.week,
-            lesson.day_number, lesson.lesson_number
-        )
-        sql_discipline = select(Discipline).where(Discipline.title == discipline_title)
-        discipline_instance, _ = await get_or_create(
-            session, Discipline, sql_discipline, title=discipline_title
-        )
-
-        sql_lesson = select(Lesson). \
-            where(Lesson.discipline_id == discipline_instance.id,
-                  Lesson.week == week,
-                  Lesson.day == day_number,
-                  Lesson.number_lesson == lesson_number)
-        lesson_instance, _ = await get_or_create(
-            session, Lesson, sql_lesson, discipline_id=discipline_instance.id,
-            type_and_location=location, week=week,
-            day=day_number, number_lesson=lesson_number
-        )
-
-        for full_name in teachers:
-            sql_teacher = select(Teacher).where(Teacher.full_name == full_name)
-            teacher_instance, _ = await get_or_create(
-                session, Teacher, sql_teacher, full_name=full_name
-            )
-
-            lesson_teachers = await session.run_sync(
-                lambda _: lesson_instance.teachers
-            )
-            if teacher_instance not in lesson_teachers:
-                await session.run_sync(
-                    lambda _: lesson_instance.teachers.append(teacher_instance)
-                )
-
-        lesson_groups = await session.run_sync(
-            lambda _: lesson_instance.groups
-        )
-        if group_instance not in lesson_groups:
-            await session.run_sync(
-                lambda _: lesson_instance.groups.append(group_instance)
-            )
-
+    report = await ingest_schedule(group_instance.id, schedule.lessons, session=session)
+    await save_schedule_fingerprint(group_instance.id, schedule.fingerprint, session=session)
     await session.commit()
+    await asyncio.gather(
+        *(schedule_cache.invalidate_group(group_id) for group_id in report.groups)
+    )
+    logger.info(f'Schedule of {group_instance} was ingested: {report}')
 
     return True
 
 
 async def create_faculty(title: str, title_short: str, *, session: AsyncSession) -> Faculty:
     """Create faculty instance in database"""
-    sql = select(Faculty).where(Faculty.title == title)
-    faculty_instance, _ = await get_or_create(
-        session, Faculty, sql, title=title, title_short=title_short
+    faculty_instance, is_created = await upsert(
+        Faculty, {'title': title, 'title_short': title_short}, session=session
     )
+    await session.commit()
+    if is_created:
+        await hierarchy.invalidate(session=session)
 
     return faculty_instance
 
@@ -120,36 +109,27 @@ async def change_title_for_faculty(
     )
     await session.execute(sql)
     await session.commit()
+    await hierarchy.invalidate(session=session)
 
 
-async def delete_faculty(
-        faculty_id: int, *, session: AsyncSession, committing: bool = True
-) -> None:
+async def delete_faculty(faculty_id: int, *, session: AsyncSession) -> DeletionReport:
     """Delete faculty instance in database by faculty_id with cascade"""
-    sql_select_departments = select(Department).where(
-        Department.faculty_id == faculty_id
+    return await _delete_structure(
+        delete(Faculty.__table__).where(Faculty.id == faculty_id), session=session
     )
-    result = await session.execute(sql_select_departments)
-    departments = result.scalars().all()
-
-    for department in departments:
-        await delete_department(department_id=department.id, session=session, committing=False)
-
-    sql = delete(Faculty).where(Faculty.id == faculty_id)
-    await session.execute(sql)
-
-    if committing:
-        await session.commit()
 
 
 async def create_department(
         faculty_id: int, title: str, title_short: str, *, session: AsyncSession
 ) -> Department:
     """Create department instance in database"""
-    sql = select(Department).where(Department.title == title)
-    department_instance, _ = await get_or_create(
-        session, Department, sql, faculty_id=faculty_id, title=title, title_short=title_short
+    department_instance, is_created = await upsert(
+        Department, {'faculty_id': faculty_id, 'title': title, 'title_short': title_short},
+        session=session
     )
+    await session.commit()
+    if is_created:
+        await hierarchy.invalidate(session=session)
     return department_instance
 
 
@@ -176,6 +156,7 @@ async def change_faculty_for_department(
     )
     await session.execute(sql)
     await session.commit()
+    await hierarchy.invalidate(session=session)
 
 
 async def change_title_for_department(
@@ -189,50 +170,36 @@ async def change_title_for_department(
     )
     await session.execute(sql)
     await session.commit()
+    await hierarchy.invalidate(session=session)
 
 
-async def delete_department(
-        *, department_id: int, session: AsyncSession, committing: bool = True
-) -> None:
+async def delete_department(*, department_id: int, session: AsyncSession) -> DeletionReport:
     """Delete department instance in database by department_id with cascade"""
-    sql_select_group = select(Group).where(Group.department_id == department_id)
-    result = await session.execute(sql_select_group)
-    groups = result.scalars().all()
-
-    for group in groups:
-        await delete_group(
-            group_id=group.id,
-            department_id=department_id,
-            session=session,
-            committing=False
-        )
-
-    sql_delete_department = delete(Department).where(Department.id == department_id)
-    await session.execute(sql_delete_department)
-
-    if committing:
-        await session.commit()
+    return await _delete_structure(
+        delete(Department.__table__).where(Department.id == department_id),
+        session=session
+    )
 
 
 async def create_group(
         department_id: int, title: str, url_schedule: str, *, session: AsyncSession
 ) -> Group:
     """Create group instance in database"""
-    sql = select(Group).where(Group.department_id == department_id, Group.title == title)
-    group_instance, _ = await get_or_create(
-        session, Group, sql, department_id=department_id,
-        title=title, schedule_url=url_schedule
+    group_instance, is_created = await upsert(
+        Group, {'department_id': department_id, 'title': title, 'schedule_url': url_schedule},
+        session=session
     )
+    await session.commit()
+    if is_created:
+        await hierarchy.invalidate(session=session)
     return group_instance
 
 
 async def get_groups_instances_by_title(title: str, *, session: AsyncSession) -> list[Group]:
     """Get groups instances by title"""
-    sql_groups = select(Group, Department, Faculty).where(
-        Group.department_id == Department.id,
-        Department.faculty_id == Faculty.id,
-        Group.title == title
-    ).options(joinedload(Group.Department).subqueryload(Department.Faculty))
+    sql_groups = select(Group).where(Group.title == title).options(
+        joinedload(Group.Department).joinedload(Department.Faculty)
+    )
     result = await session.execute(sql_groups)
     return list(result.scalars())
 
@@ -264,21 +231,15 @@ async def get_group_instance_by_id(
 
 
 async def delete_group(
-        *, group_id: int, department_id: int, session: AsyncSession, committing: bool = True
-) -> None:
-    """Delete group instance in database by group_id"""
-    sql_group_table = delete(Group).where(
-        Group.department_id == department_id, Group.id == group_id
+        *, group_id: int, department_id: int, session: AsyncSession
+) -> DeletionReport:
+    """Delete group instance in database by group_id with its users and orphaned lessons"""
+    return await _delete_structure(
+        delete(Group.__table__).where(
+            Group.department_id == department_id, Group.id == group_id
+        ),
+        session=session
     )
-    sql_group_lesson_table = text('DELETE FROM lesson_group WHERE group_id = :group_id')
-    sql_user_group = delete(User).where(User.group_id == group_id)
-
-    await session.execute(sql_group_lesson_table, {'group_id': group_id})
-    await session.execute(sql_group_table)
-    await session.execute(sql_user_group)
-
-    if committing:
-        await session.commit()
 
 
 async def change_title_for_group(
@@ -290,8 +251,15 @@ async def change_title_for_group(
     ).values(
         title=new_title
     )
-    await session.execute(sql)
+    sql_timetable = update(GroupTimetable).where(GroupTimetable.group_id == group_id).values(
+        group_title=new_title
+    )
+    result = await session.execute(sql)
+    if result.rowcount:
+        await session.execute(sql_timetable)
     await session.commit()
+    await schedule_cache.invalidate_group(group_id)
+    await hierarchy.invalidate(session=session)
 
 
 async def change_department_for_group(
@@ -303,19 +271,88 @@ async def change_department_for_group(
     ).values(department_id=new_department_id)
     await session.execute(sql)
     await session.commit()
+    await hierarchy.invalidate(session=session)
 
 
 async def change_url_schedule_for_group(
-        new_url: str, *, group_id, session: AsyncSession
+        new_url: str, *, group_id, session: AsyncSession,
+        schedule_client: ScheduleClient | None = None
 ) -> bool:
     """Change url schedule for group in database by group_id"""
-    sql_update_url = update(Group).where(Group.id == group_id).values(schedule_url=new_url)
+    sql_update_url = update(Group).where(Group.id == group_id).values(
+        schedule_url=new_url, schedule_etag=None, schedule_last_modified=None, schedule_hash=None
+    )
     sql_group_lesson_table = text('DELETE FROM lesson_group WHERE group_id = :group_id')
     await session.execute(sql_group_lesson_table, {'group_id': group_id})
     await session.execute(sql_update_url)
+    await rebuild_group_timetable(group_id, session=session)
     await session.commit()
+    await schedule_cache.invalidate_group(group_id)
+    await hierarchy.invalidate(session=session)
     sql_group = select(Group).where(Group.id == group_id)
     result = await session.execute(sql_group)
     group_instance = result.scalars().first()
 
-    return await add_information_from_schedule_to_db(group_instance, session=session)
+    return await add_information_from_schedule_to_db(
+        group_instance, session=session, schedule_client=schedule_client
+    )
+
+
+async def _delete_structure(sql_delete_root: Delete, *, session: AsyncSession) -> DeletionReport:
+    """
+    Delete faculties, departments or groups by `sql_delete_root` with everything below them
+    by one statement of data-modifying CTEs and commit it.
+    Lessons are deleted only if no other group has them, links of lessons to teachers,
+    timetables and tasks of users are deleted by ON DELETE CASCADE.
+    """
+    levels_deleted: list[ColumnElement[int]] = []
+    deleted_ids: Select | None = None
+    for table, parent_column in (
+            (Faculty.__table__, None),
+            (Department.__table__, Department.faculty_id),
+            (Group.__table__, Group.department_id)
+    ):
+        if table is sql_delete_root.table:
+            sql_delete = sql_delete_root
+        elif deleted_ids is not None:
+            sql_delete = delete(table).where(parent_column.in_(deleted_ids))
+        else:
+            levels_deleted.append(literal(0))
+            continue
+        deleted = sql_delete.returning(table.c.id).cte(f'deleted_{table.name}')
+        deleted_ids = select(deleted.c.id)
+        levels_deleted.append(select(func.count()).select_from(deleted).scalar_subquery())
+    deleted_groups = deleted
+
+    deleted_users = delete(User.__table__).where(
+        User.group_id.in_(deleted_ids)
+    ).returning(User.id).cte('deleted_users')
+    deleted_links = delete(lesson_group).where(
+        lesson_group.c.group_id.in_(deleted_ids)
+    ).returning(lesson_group.c.lesson_id).cte('deleted_links')
+    # All CTEs see the same snapshot, so links being deleted are still visible here
+    other_links = select(lesson_group.c.lesson_id).where(
+        lesson_group.c.lesson_id == Lesson.id,
+        lesson_group.c.group_id.not_in(deleted_ids)
+    )
+    deleted_lessons = delete(Lesson.__table__).where(
+        Lesson.id.in_(select(deleted_links.c.lesson_id)), ~other_links.exists()
+    ).returning(Lesson.id).cte('deleted_lessons')
+
+    sql = select(
+        *levels_deleted,
+        select(func.count()).select_from(deleted_lessons).scalar_subquery(),
+        select(func.array_agg(deleted_groups.c.id)).scalar_subquery(),
+        select(func.array_agg(deleted_users.c.id)).scalar_subquery(),
+    )
+    result = await session.execute(sql)
+    faculties, departments, groups, lessons, groups_id, users_id = result.one()
+    groups_id, users_id = groups_id or [], users_id or []
+    await session.commit()
+
+    await hierarchy.invalidate(session=session)
+    await asyncio.gather(*(schedule_cache.invalidate_group(group_id) for group_id in groups_id))
+    await user_profile_cache.invalidate(*users_id)
+    report = DeletionReport(faculties, departments, groups, len(users_id), lessons)
+    logger.info(f'Structure was deleted: {report}')
+    return report
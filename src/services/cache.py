@@ -0,0 +1,236 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Hashable, NamedTuple
+from loguru import logger
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+_missing = object()
+
+# Other bot processes drop invalidated entries from their in-process caches by messages of channel
+invalidation_channel = 'cache:invalidate'
+
+
+class LRUCache:
+    """Bounded in-process cache with eviction of least recently used entries and optional TTL"""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _missing)
+        if item is _missing:
+            return default
+
+        expires_at, value = item
+        if expires_at < monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = monotonic() + self.ttl if self.ttl is not None else float('inf')
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ScheduleCacheKey(NamedTuple):
+    group_id: int
+    view: str
+    day: int
+    week: int
+
+
+class RenderedScheduleCache:
+    """
+    Cache of rendered answers with schedule, which are the same for all users of group.
+    In-process LRU is checked first, then Redis (if it is set up) shared by all bot processes.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self._local = LRUCache(maxsize)
+        self._redis: Redis | None = None
+        self._redis_ttl = 0
+
+    def setup(self, *, maxsize: int, ttl: int, redis: Redis | None = None) -> None:
+        self._local = LRUCache(maxsize, ttl)
+        self._redis = redis
+        self._redis_ttl = ttl
+
+    async def get(self, key: ScheduleCacheKey) -> str | None:
+        answer = self._local.get(key)
+        if answer is not None or self._redis is None:
+            return answer
+
+        try:
+            answer = await self._redis.hget(
+                self._get_redis_key(key.group_id), self._get_field(key)
+            )
+        except RedisError:
+            logger.warning('Failed try get rendered schedule from Redis')
+            return None
+
+        if answer is not None:
+            answer = answer.decode()
+            self._local.set(key, answer)
+        return answer
+
+    async def set(self, key: ScheduleCacheKey, answer: str) -> None:
+        self._local.set(key, answer)
+        if self._redis is None:
+            return
+
+        redis_key = self._get_redis_key(key.group_id)
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(redis_key, self._get_field(key), answer)
+                if self._redis_ttl:
+                    pipe.expire(redis_key, self._redis_ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.warning('Failed try save rendered schedule to Redis')
+
+    async def invalidate_group(self, group_id: int) -> None:
+        """Drop all rendered answers of group, e.g. after its schedule or title was changed"""
+        self.discard_local_group(group_id)
+        if self._redis is None:
+            return
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.delete(self._get_redis_key(group_id))
+                pipe.publish(invalidation_channel, f'schedule:{group_id}')
+                await pipe.execute()
+        except RedisError:
+            logger.exception(f'Failed try invalidate rendered schedule of group #{group_id}')
+
+    def discard_local_group(self, group_id: int) -> None:
+        self._local.discard_where(lambda key: key.group_id == group_id)
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    @staticmethod
+    def _get_redis_key(group_id: int) -> str:
+        return f'schedule:rendered:{group_id}'
+
+    @staticmethod
+    def _get_field(key: ScheduleCacheKey) -> str:
+        return f'{key.view}:{key.day}:{key.week}'
+
+
+class UserProfile(NamedTuple):
+    user_id: int
+    is_registered: bool
+    group_id: int | None = None
+    is_admin: bool = False
+
+
+class UserProfileCache:
+    """
+    Cache of registration status, group and admin flag of users, checked by every command.
+    Not registered users are cached too, so registration must invalidate profile.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self._local = LRUCache(maxsize)
+        self._redis: Redis | None = None
+        self._redis_ttl = 0
+
+    def setup(self, *, maxsize: int, ttl: int, redis: Redis | None = None) -> None:
+        self._local = LRUCache(maxsize, ttl)
+        self._redis = redis
+        self._redis_ttl = ttl
+
+    async def get(self, user_id: int) -> UserProfile | None:
+        profile = self._local.get(user_id)
+        if profile is not None or self._redis is None:
+            return profile
+
+        try:
+            value = await self._redis.get(self._get_redis_key(user_id))
+        except RedisError:
+            logger.warning('Failed try get user profile from Redis')
+            return None
+
+        if value is not None:
+            profile = self._loads(user_id, value.decode())
+            self._local.set(user_id, profile)
+        return profile
+
+    async def set(self, profile: UserProfile) -> None:
+        self._local.set(profile.user_id, profile)
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.set(
+                self._get_redis_key(profile.user_id), self._dumps(profile),
+                ex=self._redis_ttl or None
+            )
+        except RedisError:
+            logger.warning('Failed try save user profile to Redis')
+
+    async def invalidate(self, *users_id: int) -> None:
+        """Drop profiles of users, e.g. after registration or deletion of their group"""
+        self.discard_local(*users_id)
+        if self._redis is None or not users_id:
+            return
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._get_redis_key(user_id) for user_id in users_id))
+                pipe.publish(invalidation_channel, f'user:{",".join(map(str, users_id))}')
+                await pipe.execute()
+        except RedisError:
+            logger.exception(f'Failed try invalidate profiles of users {users_id}')
+
+    def discard_local(self, *users_id: int) -> None:
+        for user_id in users_id:
+            self._local.pop(user_id)
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    @staticmethod
+    def _get_redis_key(user_id: int) -> str:
+        return f'user:profile:{user_id}'
+
+    @staticmethod
+    def _dumps(profile: UserProfile) -> str:
+        group_id = '' if profile.group_id is None else profile.group_id
+        return f'{int(profile.is_registered)}:{group_id}:{int(profile.is_admin)}'
+
+    @staticmethod
+    def _loads(user_id: int, value: str) -> UserProfile:
+        is_registered, group_id, is_admin = value.split(':')
+        return UserProfile(
+            user_id=user_id,
+            is_registered=is_registered == '1',
+            group_id=int(group_id) if group_id else None,
+            is_admin=is_admin == '1',
+        )
+
+
+schedule_cache = RenderedScheduleCache()
+user_profile_cache = UserProfileCache()
@@ -1,132 +1,142 @@
-from typing import Iterable
+from typing import NamedTuple
 
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, and_, Select
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import User, Group, Lesson, Discipline, Teacher
-from services.utils import (
-    get_time_of_lesson_by_number,
-    get_day_of_week_by_number,
-    get_current_day_and_week_of_schedule_number
-)
+from database.models import Group, Lesson, GroupTimetable, lesson_group
+from services.cache import schedule_cache, ScheduleCacheKey
+from services.timetable import TimetableLesson, load_timetable_lessons
+from services.render import render_week, render_day
+from services.utils import get_current_day_and_week_of_schedule_number
+
+
+class GroupSchedule(NamedTuple):
+    group_title: str | None
+    lessons: tuple[TimetableLesson, ...]
 
 
 async def get_lessons_current_or_next_week_for_user(
         *, group_id: int, next_week: bool = False, session: AsyncSession
 ) -> str:
     """Get lessons for user current or next week"""
-    group_title, lessons = await _get_group_title_and_lessons_by_group_id(session, group_id)
     _, week_of_schedule_number = get_current_day_and_week_of_schedule_number()
 
     if next_week:
         week_of_schedule_number = 1 if week_of_schedule_number == 2 else 2
 
-    current_lessons_id = [lesson.id for lesson in lessons if lesson.week == week_of_schedule_number]
-    sql_lessons = select(Lesson, Discipline).where(
-        Lesson.discipline_id == Discipline.id,
-        Lesson.id.in_(current_lessons_id),
-        Lesson.week == week_of_schedule_number
-    ).options(joinedload(Lesson.Discipline)).order_by(Lesson.day, Lesson.number_lesson)
-    result = await session.execute(sql_lessons)
-    current_lessons = tuple(result.scalars())
-
-    sorted_lessons = [
-        tuple(filter(lambda lesson: lesson.day == i, current_lessons)) for i in range(1, 8)
-    ]
-
-    answer = (
-        f'<b>Пари {"наступного" if next_week else "поточного"} тижня '
-        f'у групи {group_title}:</b>\n\n'
+    cache_key = ScheduleCacheKey(
+        group_id, 'next_week' if next_week else 'current_week', 0, week_of_schedule_number
     )
-    for day, day_lessons in enumerate(sorted_lessons, 1):
-        if day_lessons:
-            day_of_week = get_day_of_week_by_number(day)
-            answer += f'<em><b>{day_of_week}:</b></em>\n'
-            for lesson in day_lessons:
-                teachers: Iterable[Teacher] = await session.run_sync(
-                    lambda _: lesson.teachers
-                )
-                answer += (
-                        f'<b>[{lesson.number_lesson}]</b> <em>{lesson.Discipline.title}</em>\n' +
-                        (f'<em>{", ".join(teacher.full_name for teacher in teachers)}</em>\n'
-                         if teachers else '')
-                )
-            answer += '\n'
+    answer = await schedule_cache.get(cache_key)
+    if answer is None:
+        answer = await _render_lessons_of_week(
+            group_id, week_of_schedule_number, next_week=next_week, session=session
+        )
+        await schedule_cache.set(cache_key, answer)
 
     return answer
 
 
+async def _render_lessons_of_week(
+        group_id: int, week_of_schedule_number: int, *, next_week: bool, session: AsyncSession
+) -> str:
+    """Render answer with lessons of group for week"""
+    group_title, current_lessons = await get_group_timetable(
+        group_id, week=week_of_schedule_number, session=session
+    )
+
+    return render_week(group_title, current_lessons, next_week=next_week)
+
+
 async def get_lessons_today_or_tomorrow_for_user(
         *, group_id: int, tomorrow: bool = False, session: AsyncSession
 ) -> str:
     """Get lessons for user today or tomorrow"""
-    group_title, lessons = await _get_group_title_and_lessons_by_group_id(session, group_id)
-
     day_of_week_number, week_of_schedule_number = get_current_day_and_week_of_schedule_number(
         is_tomorrow=tomorrow
     )
 
-    current_lessons_id = [
-        lesson.id for lesson in lessons
-        if lesson.day == day_of_week_number and lesson.week == week_of_schedule_number
-    ]
-
-    sql_lessons = select(Lesson, Discipline).where(
-        Lesson.discipline_id == Discipline.id,
-        Lesson.day == day_of_week_number,
-        Lesson.id.in_(current_lessons_id),
-        Lesson.week == week_of_schedule_number
-    ).options(joinedload(Lesson.Discipline)).order_by(Lesson.number_lesson)
-    result = await session.execute(sql_lessons)
-    current_lessons = tuple(result.scalars())
-
-    current_day = "завтра" if tomorrow else "сьогодні"
-    if len(current_lessons) == 0:
-        return (
-            f'<b>У групи <em>{group_title}</em> {current_day} немає пар</b>'
-        )
-
-    answer = (
-        f'<b>Пари {"завтра" if tomorrow else "сьогодні"} '
-        f'у групи {group_title}:</b>\n\n'
+    cache_key = ScheduleCacheKey(
+        group_id, 'tomorrow' if tomorrow else 'today', day_of_week_number, week_of_schedule_number
     )
-    for lesson in current_lessons:
-        teachers: Iterable[Teacher] = await session.run_sync(
-            lambda _: lesson.teachers
-        )
-        lesson_time = get_time_of_lesson_by_number(lesson.number_lesson)
-        answer += (
-                f'<b>[{lesson.number_lesson}] <em>[{lesson_time}]</em></b> '
-                f'<em>{lesson.Discipline.title}</em>\n' +
-                (f'<em>{", ".join(teacher.full_name for teacher in teachers)}</em>\n'
-                 if teachers else '') +
-                (f'<em><b>Інформація:</b> {lesson.type_and_location}</em>\n\n'
-                 if lesson.type_and_location != "Немає інформації" else '\n')
+    answer = await schedule_cache.get(cache_key)
+    if answer is None:
+        answer = await _render_lessons_of_day(
+            group_id, day_of_week_number, week_of_schedule_number,
+            tomorrow=tomorrow, session=session
         )
+        await schedule_cache.set(cache_key, answer)
 
     return answer
 
 
-async def get_group_id_by_user_id(*, user_id: int, session: AsyncSession) -> int:
-    """Get group id by user id"""
-    sql_user = select(User).where(User.id == user_id)
-    result = await session.execute(sql_user)
-    user = result.scalars().first()
-    return user.group_id
+async def _render_lessons_of_day(
+        group_id: int, day_of_week_number: int, week_of_schedule_number: int, *,
+        tomorrow: bool, session: AsyncSession
+) -> str:
+    """Render answer with lessons of group for day"""
+    group_title, current_lessons = await get_group_timetable(
+        group_id, week=week_of_schedule_number, day=day_of_week_number, session=session
+    )
+
+    return render_day(group_title, current_lessons, tomorrow=tomorrow)
 
 
-async def _get_group_title_and_lessons_by_group_id(
-        session: AsyncSession, group_id: int
-) -> (str, Iterable[Lesson]):
-    """Get group title and lessons by group id"""
-    sql = select(Group).where(
-        Group.id == group_id
+async def get_group_timetable(
+        group_id: int, *, week: int, day: int | None = None, session: AsyncSession
+) -> GroupSchedule:
+    """
+    Get group title and its lessons of week (and day) from timetable by primary key.
+    If timetable of group is not built yet, lessons are selected from normalized tables.
+    """
+    sql = select(GroupTimetable.group_title, GroupTimetable.lessons).where(
+        GroupTimetable.group_id == group_id, GroupTimetable.week == week
     )
     result = await session.execute(sql)
-    group_instance: Group = result.scalars().first()
-
-    lessons: Iterable[Lesson] = await session.run_sync(
-        lambda _: group_instance.lessons
+    row = result.first()
+    if row is None:
+        return await get_group_schedule(group_id, week=week, day=day, session=session)
+
+    lessons = load_timetable_lessons(row.lessons)
+    if day is not None:
+        lessons = tuple(lesson for lesson in lessons if lesson.day == day)
+    return GroupSchedule(row.group_title, lessons)
+
+
+async def get_group_schedule(
+        group_id: int, *, week: int, day: int | None = None, session: AsyncSession
+) -> GroupSchedule:
+    """Get group title and its lessons of week (and day) in one query"""
+    result = await session.execute(_select_group_schedule(group_id, week=week, day=day))
+    rows = result.all()
+
+    group_title = rows[0].title if rows else None
+    lessons = tuple(
+        TimetableLesson(
+            row.Lesson.day, row.Lesson.number_lesson, row.Lesson.Discipline.title,
+            tuple(teacher.full_name for teacher in sorted(
+                row.Lesson.teachers, key=lambda teacher: teacher.id
+            )),
+            row.Lesson.type_and_location
+        )
+        for row in rows if row.Lesson is not None
     )
-    return group_instance.title, lessons
+    return GroupSchedule(group_title, lessons)
+
+
+def _select_group_schedule(group_id: int, *, week: int, day: int | None = None) -> Select:
+    """Build query of group title with its lessons of week (and day)"""
+    lessons_condition = and_(lesson_group.c.lesson_id == Lesson.id, Lesson.week == week)
+    if day is not None:
+        lessons_condition = and_(lessons_condition, Lesson.day == day)
+
+    # Outer join keeps row with title of group, which has no lessons in this week or day
+    lessons_of_group = lesson_group.join(Lesson, lessons_condition)
+    return select(Group.title, Lesson).select_from(Group).outerjoin(
+        lessons_of_group, lesson_group.c.group_id == Group.id
+    ).where(
+        Group.id == group_id
+    ).options(
+        joinedload(Lesson.Discipline), selectinload(Lesson.teachers)
+    ).order_by(Lesson.day, Lesson.number_lesson, Lesson.id)
@@ -0,0 +1,100 @@
+import asyncio
+from contextlib import nullcontext
+from typing import NamedTuple
+from loguru import logger
+
+from sqlalchemy import select, delete, Table, Exists
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from cluster.lock import ClusterLock
+from config_loader import GarbageCollectorConfig
+from database.models import Lesson, Discipline, Teacher, lesson_group, lesson_teacher
+
+
+class GarbageReport(NamedTuple):
+    lessons: int
+    disciplines: int
+    teachers: int
+    batches: int
+
+
+# Lessons go first, their deletion leaves disciplines and teachers without references
+_orphans: tuple[tuple[Table, Exists], ...] = (
+    (
+        Lesson.__table__,
+        select(lesson_group.c.lesson_id).where(lesson_group.c.lesson_id == Lesson.id).exists()
+    ),
+    (
+        Discipline.__table__,
+        select(Lesson.id).where(Lesson.discipline_id == Discipline.id).exists()
+    ),
+    (
+        Teacher.__table__,
+        select(lesson_teacher.c.teacher_id).where(
+            lesson_teacher.c.teacher_id == Teacher.id
+        ).exists()
+    ),
+)
+
+
+class GarbageCollector:
+    """
+    Periodically delete lessons without groups and disciplines and teachers without lessons.
+    Rows are deleted by small batches in separate transactions with pause between them,
+    so locks are short and database is not loaded by collection.
+    With several bot processes collection is run by process, which acquired lock for interval.
+    """
+
+    def __init__(
+            self, session_pool: async_sessionmaker, config: GarbageCollectorConfig,
+            lock: ClusterLock | None = None
+    ):
+        self.session_pool = session_pool
+        self.config = config
+        self.lock = lock
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.interval)
+            try:
+                # Lock is not released, it expires after interval as lease of collection
+                if self.lock is not None and not await self.lock.acquire():
+                    logger.debug('Garbage is collected by other bot process')
+                    continue
+                async with self.lock.keep_alive() if self.lock is not None else nullcontext():
+                    await self.collect()
+            except Exception:
+                logger.exception('Failed try collect orphaned lessons, disciplines and teachers')
+
+    async def collect(self) -> GarbageReport:
+        """Delete all orphaned rows and return count of deleted rows of every table"""
+        loop = asyncio.get_running_loop()
+        time_start = loop.time()
+        deleted, batches = [], 0
+        for table, is_referenced in _orphans:
+            table_deleted, table_batches = await self._collect_table(table, is_referenced)
+            deleted.append(table_deleted)
+            batches += table_batches
+
+        report = GarbageReport(*deleted, batches=batches)
+        logger.info(f'Garbage was collected in {loop.time() - time_start:.1f} seconds: {report}')
+        return report
+
+    async def _collect_table(self, table: Table, is_referenced: Exists) -> (int, int):
+        """Delete unreferenced rows of table by batches and return count of rows and batches"""
+        orphans_id = select(table.c.id).where(~is_referenced).limit(
+            self.config.batch_size
+        ).with_for_update(skip_locked=True)
+        sql = delete(table).where(table.c.id.in_(orphans_id.scalar_subquery()))
+
+        deleted = batches = 0
+        while True:
+            # Rows resolved or referenced meanwhile by ingestion are locked by it and skipped
+            async with self.session_pool() as session:
+                result = await session.execute(sql)
+                await session.commit()
+            deleted += result.rowcount
+            batches += 1
+            if result.rowcount < self.config.batch_size:
+                return deleted, batches
+            await asyncio.sleep(self.config.batch_pause)
@@ -0,0 +1,185 @@
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+from uuid import uuid4
+from loguru import logger
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Faculty, Department, Group
+from services.cache import invalidation_channel
+from services.search import GroupTitleIndex, GroupMatch
+
+
+# Nodes have the same attributes as models, so keyboards and messages accept both of them
+class FacultyNode(NamedTuple):
+    id: int
+    title: str
+    title_short: str
+
+
+class DepartmentNode(NamedTuple):
+    id: int
+    title: str
+    title_short: str
+    faculty_id: int
+    Faculty: FacultyNode
+
+
+class GroupNode(NamedTuple):
+    id: int
+    title: str
+    schedule_url: str | None
+    department_id: int
+    Department: DepartmentNode
+
+
+class GroupSearchResult(NamedTuple):
+    is_exact: bool
+    groups: list[GroupNode]
+
+
+class HierarchySnapshot:
+    """Immutable tree of faculties, departments and groups with lookups by id and title"""
+
+    def __init__(
+            self, version: int, faculties: list[FacultyNode],
+            departments: list[DepartmentNode], groups: list[GroupNode]
+    ):
+        self.version = version
+        self.faculties: Mapping[int, FacultyNode] = MappingProxyType(
+            {faculty.id: faculty for faculty in faculties}
+        )
+        self.departments: Mapping[int, DepartmentNode] = MappingProxyType(
+            {department.id: department for department in departments}
+        )
+        self.groups: Mapping[int, GroupNode] = MappingProxyType(
+            {group.id: group for group in groups}
+        )
+        # The first instance wins for duplicated titles as it was with queries
+        self._faculties_by_title = MappingProxyType(
+            {faculty.title: faculty for faculty in reversed(faculties)}
+        )
+        self._departments_by_title = MappingProxyType(
+            {department.title: department for department in reversed(departments)}
+        )
+        groups_by_title: dict[str, list[GroupNode]] = {}
+        for group in groups:
+            groups_by_title.setdefault(group.title, []).append(group)
+        self._groups_by_title = MappingProxyType(
+            {title: tuple(title_groups) for title, title_groups in groups_by_title.items()}
+        )
+        self.group_index = GroupTitleIndex((group.id, group.title) for group in groups)
+
+    def faculty_by_title(self, title: str) -> FacultyNode | None:
+        return self._faculties_by_title.get(title)
+
+    def department_by_title(self, title: str) -> DepartmentNode | None:
+        return self._departments_by_title.get(title)
+
+    def groups_by_title(self, title: str) -> tuple[GroupNode, ...]:
+        return self._groups_by_title.get(title, ())
+
+    def group_by_title(self, title: str, *, department_id: int) -> GroupNode | None:
+        for group in self.groups_by_title(title):
+            if group.department_id == department_id:
+                return group
+        return None
+
+    def group(self, group_id: int, *, department_id: int | None = None) -> GroupNode | None:
+        group = self.groups.get(group_id)
+        if group is None or department_id is not None and group.department_id != department_id:
+            return None
+        return group
+
+    def search_groups(self, title: str, *, limit: int = 8) -> GroupSearchResult:
+        """Find groups by title typed by user, see GroupTitleIndex"""
+        matches: list[GroupMatch] = self.group_index.search(title, limit=limit)
+        return GroupSearchResult(
+            bool(matches) and matches[0].is_exact,
+            [self.groups[match.group_id] for match in matches]
+        )
+
+
+class Hierarchy:
+    """
+    Snapshot of faculties, departments and groups kept in process. It is loaded at startup
+    and replaced after every change by admin, other bot processes drop it by pub/sub message.
+    """
+
+    def __init__(self):
+        self._snapshot: HierarchySnapshot | None = None
+        self._version = 0
+        self._redis: Redis | None = None
+        # Sent in invalidation message, so process does not drop snapshot it just reloaded
+        self.process_id = uuid4().hex
+
+    def setup(self, *, redis: Redis | None = None) -> None:
+        self._redis = redis
+
+    async def get(self, *, session: AsyncSession) -> HierarchySnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self._load(session)
+        return snapshot
+
+    async def reload(self, *, session: AsyncSession) -> HierarchySnapshot:
+        self.discard_local()
+        return await self._load(session)
+
+    async def invalidate(self, *, session: AsyncSession) -> None:
+        """Replace snapshot after committed change, other bot processes reload it on next use"""
+        await self.reload(session=session)
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.publish(invalidation_channel, f'hierarchy:{self.process_id}')
+        except RedisError:
+            logger.exception('Failed try invalidate hierarchy of faculties')
+
+    def discard_local(self) -> None:
+        self._snapshot = None
+        self._version += 1
+
+    async def _load(self, session: AsyncSession) -> HierarchySnapshot:
+        version = self._version
+        result = await session.execute(
+            select(Faculty.id, Faculty.title, Faculty.title_short).order_by(Faculty.id)
+        )
+        faculties = {row.id: FacultyNode(*row) for row in result}
+
+        result = await session.execute(select(
+            Department.id, Department.title, Department.title_short, Department.faculty_id
+        ).order_by(Department.id))
+        departments = {
+            row.id: DepartmentNode(*row, faculties[row.faculty_id])
+            for row in result if row.faculty_id in faculties
+        }
+
+        result = await session.execute(select(
+            Group.id, Group.title, Group.schedule_url, Group.department_id
+        ).order_by(Group.id))
+        groups = [
+            GroupNode(*row, departments[row.department_id])
+            for row in result if row.department_id in departments
+        ]
+
+        snapshot = HierarchySnapshot(
+            version, list(faculties.values()), list(departments.values()), groups
+        )
+        # Snapshot loaded before invalidation is used only by this caller
+        if version == self._version:
+            self._snapshot = snapshot
+        return snapshot
+
+
+hierarchy = Hierarchy()
+
+
+async def search_groups_by_title(title: str, *, session: AsyncSession) -> GroupSearchResult:
+    """Find groups by title typed by user, with departments and faculties for keyboards"""
+    snapshot = await hierarchy.get(session=session)
+    return snapshot.search_groups(title)
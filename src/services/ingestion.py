@@ -0,0 +1,235 @@
+from typing import NamedTuple, Type, Any
+
+from sqlalchemy import (
+    select, update, delete, tuple_, and_, or_, literal_column, Table, Select, ColumnElement
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import (
+    Base, Group, Discipline, Teacher, Lesson, lesson_teacher, lesson_group
+)
+from parser.datatypes import LessonTuple, ScheduleFingerprint
+from services.timetable import rebuild_groups_timetables
+
+_lesson_key_names = ('discipline_id', 'week', 'day', 'number_lesson')
+
+
+class IngestionReport(NamedTuple):
+    inserted: int
+    matched: int
+    unchanged: int
+    removed: int
+    updated: int  # lessons with changed type and location
+    groups: tuple[int, ...]  # groups with rebuilt timetables, schedule and ones sharing lessons
+
+
+async def ingest_schedule(
+        group_id: int, lessons: list[LessonTuple], *, session: AsyncSession
+) -> IngestionReport:
+    """
+    Write parsed schedule of group to database with set-based statements.
+    Disciplines, teachers and lessons are inserted if missing and matched by natural key
+    otherwise, type and location of matched lessons not shared with other groups is updated,
+    their links to teachers absent in schedule and links of group to lessons absent
+    in schedule are removed and timetables of group and other groups sharing its lessons
+    are rebuilt.
+    Transaction is not committed, this is responsibility of caller.
+    """
+    discipline_titles = list(dict.fromkeys(lesson.discipline for lesson in lessons))
+    teacher_names = list(dict.fromkeys(
+        full_name for lesson in lessons for full_name in lesson.teachers
+    ))
+
+    disciplines_id, disciplines_inserted, _ = await _insert_missing_and_resolve_ids(
+        session, Discipline, ('title',), [{'title': title} for title in discipline_titles]
+    )
+    teachers_id, teachers_inserted, _ = await _insert_missing_and_resolve_ids(
+        session, Teacher, ('full_name',), [{'full_name': name} for name in teacher_names]
+    )
+
+    # Several parsed lessons may share natural key (e.g. lesson of two subgroups),
+    # first location wins and teachers are merged as it was with get_or_create
+    lessons_values: dict[tuple, dict[str, Any]] = {}
+    lessons_teachers: dict[tuple, dict[str, None]] = {}
+    for lesson in lessons:
+        key = (
+            disciplines_id[(lesson.discipline,)], lesson.week,
+            lesson.day_number, lesson.lesson_number
+        )
+        lessons_values.setdefault(key, {
+            **dict(zip(_lesson_key_names, key)), 'type_and_location': lesson.location
+        })
+        lessons_teachers.setdefault(key, {}).update(dict.fromkeys(lesson.teachers))
+
+    # Lesson shared with other groups is left as is, their schedules may differ in its details
+    lessons_id, lessons_inserted, lessons_updated = await _insert_missing_and_resolve_ids(
+        session, Lesson, _lesson_key_names, list(lessons_values.values()),
+        update_names=('type_and_location',),
+        update_where=Lesson.id.not_in(_lessons_of_other_groups(group_id))
+    )
+
+    teacher_links = [
+        {'lesson_id': lessons_id[key], 'teacher_id': teachers_id[(full_name,)]}
+        for key, full_names in lessons_teachers.items() for full_name in full_names
+    ]
+    group_links = [
+        {'lesson_id': lesson_id, 'group_id': group_id} for lesson_id in lessons_id.values()
+    ]
+    teacher_links_inserted = await _insert_links(session, lesson_teacher, teacher_links)
+    teacher_links_removed = await _delete_stale_teacher_links(
+        session, group_id, list(lessons_id.values()), teacher_links
+    )
+    group_links_inserted = await _insert_links(session, lesson_group, group_links)
+
+    sql_delete_stale_links = delete(lesson_group).where(lesson_group.c.group_id == group_id)
+    if lessons_id:
+        sql_delete_stale_links = sql_delete_stale_links.where(
+            lesson_group.c.lesson_id.not_in(list(lessons_id.values()))
+        )
+    result = await session.execute(sql_delete_stale_links)
+    links_removed = result.rowcount + teacher_links_removed
+
+    # Lessons are shared by groups, so their changes by this schedule are shown to others too
+    groups_id = {group_id}
+    if lessons_id:
+        sql_sharing_groups = select(lesson_group.c.group_id.distinct()).where(
+            lesson_group.c.lesson_id.in_(list(lessons_id.values()))
+        )
+        result = await session.execute(sql_sharing_groups)
+        groups_id.update(result.scalars())
+    await rebuild_groups_timetables(sorted(groups_id), session=session)
+
+    rows_inserted = disciplines_inserted + teachers_inserted + lessons_inserted
+    links_inserted = teacher_links_inserted + group_links_inserted
+    return IngestionReport(
+        inserted=rows_inserted + links_inserted,
+        matched=len(disciplines_id) + len(teachers_id) + len(lessons_id) - rows_inserted,
+        unchanged=len(teacher_links) + len(group_links) - links_inserted,
+        removed=links_removed,
+        updated=lessons_updated,
+        groups=tuple(sorted(groups_id))
+    )
+
+
+async def save_schedule_fingerprint(
+        group_id: int, fingerprint: ScheduleFingerprint, *, session: AsyncSession
+) -> None:
+    """Save fingerprint of fetched schedule page for group, transaction is not committed"""
+    sql = update(Group).where(Group.id == group_id).values(
+        schedule_etag=fingerprint.etag,
+        schedule_last_modified=fingerprint.last_modified,
+        schedule_hash=fingerprint.content_hash
+    )
+    await session.execute(sql)
+
+
+def get_schedule_fingerprint(group_instance: Group) -> ScheduleFingerprint:
+    """Get fingerprint of last fetched schedule page of group"""
+    return ScheduleFingerprint(
+        etag=group_instance.schedule_etag,
+        last_modified=group_instance.schedule_last_modified,
+        content_hash=group_instance.schedule_hash
+    )
+
+
+async def _insert_missing_and_resolve_ids(
+        session: AsyncSession, class_model: Type[Base], key_names: tuple[str, ...],
+        rows: list[dict[str, Any]], update_names: tuple[str, ...] = (),
+        update_where: ColumnElement[bool] | None = None
+) -> (dict[tuple, int], int, int):
+    """
+    Insert rows absent in table, overwrite changed `update_names` columns of existing ones
+    matching `update_where` and return ids of all rows by natural key with counts
+    of inserted and updated rows
+    """
+    if not rows:
+        return {}, 0, 0
+
+    key_columns = [getattr(class_model, name) for name in key_names]
+    ids, inserted, updated = {}, 0, 0
+    # Rows are locked in order of natural key, so concurrent refreshes do not deadlock
+    pending_rows = sorted(rows, key=lambda row: tuple(row[name] for name in key_names))
+    while pending_rows:
+        sql_insert = insert(class_model).values(pending_rows)
+        if update_names:
+            sql_changed = or_(*(
+                getattr(class_model, name).is_distinct_from(sql_insert.excluded[name])
+                for name in update_names
+            ))
+            sql_insert = sql_insert.on_conflict_do_update(
+                index_elements=key_names,
+                set_={name: sql_insert.excluded[name] for name in update_names},
+                where=sql_changed if update_where is None else and_(sql_changed, update_where)
+            )
+        else:
+            sql_insert = sql_insert.on_conflict_do_nothing()
+        # xmax of row is zero only if it was inserted by this transaction, not updated
+        sql_insert = sql_insert.returning(
+            class_model.id, literal_column('xmax = 0'), *key_columns
+        )
+        result = await session.execute(sql_insert)
+        for row in result:
+            ids[tuple(row[2:])] = row[0]
+            inserted += row[1]
+            updated += not row[1]
+
+        missing_keys = [
+            key for key in (tuple(row[name] for name in key_names) for row in pending_rows)
+            if key not in ids
+        ]
+        if missing_keys:
+            # Existing rows are locked against deletion, so garbage collector skips them
+            sql_select = select(class_model.id, *key_columns).where(
+                key_columns[0].in_([key[0] for key in missing_keys]) if len(key_columns) == 1
+                else tuple_(*key_columns).in_(missing_keys)
+            ).order_by(*key_columns).with_for_update(read=True, key_share=True)
+            result = await session.execute(sql_select)
+            ids.update({tuple(row[1:]): row[0] for row in result})
+
+        # Row deleted by garbage collector before it was locked is inserted again
+        pending_rows = [
+            row for row in pending_rows if tuple(row[name] for name in key_names) not in ids
+        ]
+
+    return ids, inserted, updated
+
+
+async def _insert_links(session: AsyncSession, table: Table, rows: list[dict[str, int]]) -> int:
+    """Insert rows to association table skipping existing and return count of inserted"""
+    if not rows:
+        return 0
+
+    # Rows are locked in order of primary key, so concurrent refreshes do not deadlock
+    rows = sorted(rows, key=lambda row: tuple(row[column.name] for column in table.primary_key))
+    sql = insert(table).values(rows).on_conflict_do_nothing().returning(table.c.lesson_id)
+    result = await session.execute(sql)
+    return len(result.all())
+
+
+async def _delete_stale_teacher_links(
+        session: AsyncSession, group_id: int, lessons_id: list[int],
+        teacher_links: list[dict[str, int]]
+) -> int:
+    """
+    Delete links of lessons to teachers, which are not in schedule, and return their count.
+    Lessons shared with other groups keep their teachers, they may be in schedules of others
+    """
+    if not lessons_id:
+        return 0
+
+    sql = delete(lesson_teacher).where(
+        lesson_teacher.c.lesson_id.in_(lessons_id),
+        lesson_teacher.c.lesson_id.not_in(_lessons_of_other_groups(group_id))
+    )
+    if teacher_links:
+        sql = sql.where(tuple_(lesson_teacher.c.lesson_id, lesson_teacher.c.teacher_id).not_in(
+            [(link['lesson_id'], link['teacher_id']) for link in teacher_links]
+        ))
+    result = await session.execute(sql)
+    return result.rowcount
+
+
+def _lessons_of_other_groups(group_id: int) -> Select:
+    """Select ids of lessons linked to groups other than given one"""
+    return select(lesson_group.c.lesson_id).where(lesson_group.c.group_id != group_id)
@@ -4,17 +4,21 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import User
+from services.cache import user_profile_cache
+from services.utils import upsert
 
 
 async def register_user(group_id: int, *, user_id: int, session: AsyncSession) -> bool:
     """Register user in database"""
     try:
-        await session.merge(
-            User(id=user_id, group_id=group_id, is_admin=False)
+        await upsert(
+            User, {'id': user_id, 'group_id': group_id, 'is_admin': False},
+            update=('group_id', 'is_admin'), session=session
         )
         await session.commit()
     except SQLAlchemyError:
         logger.exception('Failed try save new User in database')
         return False
     else:
+        await user_profile_cache.invalidate(user_id)
         return True
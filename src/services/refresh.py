@@ -0,0 +1,131 @@
+import asyncio
+import random
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+from loguru import logger
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from cluster.lock import ClusterLock
+from config_loader import RefreshConfig
+from database.models import Group
+from parser.client import ScheduleClient
+from parser.parsing import fetch_schedule_tables
+from parser.datatypes import ScheduleFetch
+from services.cache import schedule_cache
+from services.ingestion import (
+    ingest_schedule, save_schedule_fingerprint, get_schedule_fingerprint
+)
+
+
+class HostRateLimiter:
+    """Spread requests to every host so that no more than `rate` are sent per second"""
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate
+        self._next_slots: dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        host = urlsplit(url).hostname or ''
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slots.get(host, now))
+        self._next_slots[host] = slot + self._interval
+        await asyncio.sleep(slot - now)
+
+
+class ScheduleRefresher:
+    """
+    Periodically re-fetch schedules of all groups with bounded parallelism.
+    With several bot processes refresh is run by process, which acquired lock for interval.
+    """
+
+    def __init__(
+            self, session_pool: async_sessionmaker, schedule_client: ScheduleClient,
+            config: RefreshConfig, lock: ClusterLock | None = None
+    ):
+        self.session_pool = session_pool
+        self.schedule_client = schedule_client
+        self.config = config
+        self.lock = lock
+        self._semaphore = asyncio.Semaphore(config.concurrency)
+        self._rate_limiter = HostRateLimiter(config.host_rate)
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.interval)
+            try:
+                # Lock is not released, it expires after interval as lease of refresh
+                if self.lock is not None and not await self.lock.acquire():
+                    logger.debug('Schedules are refreshed by other bot process')
+                    continue
+                # Refresh longer than interval doesn't let other process start one more
+                async with self.lock.keep_alive() if self.lock is not None else nullcontext():
+                    await self.refresh_all()
+            except Exception:
+                logger.exception('Failed try refresh schedules of groups')
+
+    async def refresh_all(self) -> int:
+        """Refresh schedules of all groups and return count of successfully refreshed"""
+        async with self.session_pool() as session:
+            sql = select(Group).where(Group.schedule_url.is_not(None))
+            result = await session.execute(sql)
+            groups = result.scalars().all()
+
+        loop = asyncio.get_running_loop()
+        time_start = loop.time()
+        results = await asyncio.gather(*(self.refresh_group(group) for group in groups))
+        refreshed = sum(results)
+        logger.info(
+            f'Refreshed schedules of {refreshed}/{len(groups)} groups '
+            f'in {loop.time() - time_start:.1f} seconds, '
+            f'parser: {self.schedule_client.executor.stats}'
+        )
+        return refreshed
+
+    async def refresh_group(self, group_instance: Group) -> bool:
+        """Fetch schedule of group and write it through ingestion service if it was changed"""
+        group_id, url = group_instance.id, group_instance.schedule_url
+        fingerprint = get_schedule_fingerprint(group_instance)
+
+        async with self._semaphore:
+            await asyncio.sleep(random.uniform(0, self.config.jitter))
+            await self._rate_limiter.wait(url)
+
+            try:
+                schedule: ScheduleFetch = await fetch_schedule_tables(
+                    url, fingerprint=fingerprint, client=self.schedule_client
+                )
+            except Exception:
+                logger.exception(f'Failed try get schedule of group #{group_id} from {url}')
+                return False
+
+            if schedule.modified and not schedule.lessons:
+                logger.warning(f'Schedule of group #{group_id} is empty, refresh skipped')
+                return False
+
+            if not schedule.modified and schedule.fingerprint == fingerprint:
+                logger.debug(f'Schedule of group #{group_id} was not modified')
+                return True
+
+            async with self.session_pool() as session:
+                try:
+                    if schedule.modified:
+                        report = await ingest_schedule(group_id, schedule.lessons, session=session)
+                        logger.debug(f'Schedule of group #{group_id} was refreshed: {report}')
+                    await save_schedule_fingerprint(
+                        group_id, schedule.fingerprint, session=session
+                    )
+                    await session.commit()
+                except SQLAlchemyError:
+                    logger.exception(f'Failed try save schedule of group #{group_id}')
+                    return False
+
+            if schedule.modified and (report.inserted or report.updated or report.removed):
+                await asyncio.gather(*(
+                    schedule_cache.invalidate_group(rebuilt_group_id)
+                    for rebuilt_group_id in report.groups
+                ))
+
+        return True
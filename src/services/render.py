@@ -0,0 +1,91 @@
+from functools import lru_cache
+from itertools import groupby
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Iterable, Iterator
+
+from services.timetable import TimetableLesson
+from services.utils import lesson_times, days_of_week
+
+_lesson_day = attrgetter('day')
+_no_information = 'Немає інформації'
+
+# Layouts are compiled once, constant parts of messages are not formatted per request
+_week_titles = MappingProxyType({
+    False: '<b>Пари поточного тижня у групи {}:</b>\n\n'.format,
+    True: '<b>Пари наступного тижня у групи {}:</b>\n\n'.format,
+})
+_day_titles = MappingProxyType({
+    False: '<b>Пари сьогодні у групи {}:</b>\n\n'.format,
+    True: '<b>Пари завтра у групи {}:</b>\n\n'.format,
+})
+_no_lessons_titles = MappingProxyType({
+    False: '<b>У групи <em>{}</em> сьогодні немає пар</b>'.format,
+    True: '<b>У групи <em>{}</em> завтра немає пар</b>'.format,
+})
+_day_headers = MappingProxyType({
+    day: f'<em><b>{day_of_week}:</b></em>\n' for day, day_of_week in days_of_week.items()
+})
+_week_lesson_numbers = MappingProxyType({
+    number: f'<b>[{number}]</b> ' for number in lesson_times
+})
+_day_lesson_numbers = MappingProxyType({
+    number: f'<b>[{number}] <em>[{lesson_time}]</em></b> '
+    for number, lesson_time in lesson_times.items()
+})
+
+
+# Fragments of lessons are rendered once, lessons of a group repeat every week
+@lru_cache(maxsize=8192)
+def _week_lesson_fragment(lesson: TimetableLesson) -> str:
+    number = lesson.number_lesson
+    return (
+        (_week_lesson_numbers.get(number) or f'<b>[{number}]</b> ') +
+        f'<em>{lesson.discipline}</em>\n' +
+        (f'<em>{", ".join(lesson.teachers)}</em>\n' if lesson.teachers else '')
+    )
+
+
+@lru_cache(maxsize=8192)
+def _day_lesson_fragment(lesson: TimetableLesson) -> str:
+    return (
+        _day_lesson_numbers[lesson.number_lesson] +
+        f'<em>{lesson.discipline}</em>\n' +
+        (f'<em>{", ".join(lesson.teachers)}</em>\n' if lesson.teachers else '') +
+        (f'<em><b>Інформація:</b> {lesson.type_and_location}</em>\n\n'
+         if lesson.type_and_location != _no_information else '\n')
+    )
+
+
+def group_lessons_by_day(
+        lessons: Iterable[TimetableLesson]
+) -> Iterator[tuple[int, list[TimetableLesson]]]:
+    """Group lessons ordered by day and number in one pass, days without lessons are skipped"""
+    for day, day_lessons in groupby(lessons, key=_lesson_day):
+        yield day, list(day_lessons)
+
+
+def render_week(
+        group_title: str | None, lessons: Iterable[TimetableLesson], *, next_week: bool
+) -> str:
+    """Render answer with lessons of group for week (current or next)"""
+    fragments = [_week_titles[next_week](group_title)]
+    append = fragments.append
+    for day, day_lessons in group_lessons_by_day(lessons):
+        append(_day_headers[day])
+        fragments += map(_week_lesson_fragment, day_lessons)
+        append('\n')
+
+    return ''.join(fragments)
+
+
+def render_day(
+        group_title: str | None, lessons: Iterable[TimetableLesson], *, tomorrow: bool
+) -> str:
+    """Render answer with lessons of group for day (today or tomorrow)"""
+    fragments = [_day_titles[tomorrow](group_title)]
+    fragments += map(_day_lesson_fragment, lessons)
+
+    if len(fragments) == 1:
+        return _no_lessons_titles[tomorrow](group_title)
+    return ''.join(fragments)
@@ -0,0 +1,98 @@
+import re
+from bisect import bisect_left
+from typing import Iterable, NamedTuple
+
+_separators = re.compile(r'[\W_]+')
+# Latin letters, which look like Cyrillic ones, after casefold
+_look_alikes = str.maketrans('abcehikmoptxy', 'авсенікмортху')
+
+_exact, _prefix, _fuzzy = 0, 1, 2
+
+
+def normalize_group_title(title: str) -> str:
+    """Make title insensitive to case, separators and Latin look-alikes: 'ЛA п-11' -> 'лап11'"""
+    return _separators.sub('', title.casefold()).translate(_look_alikes)
+
+
+def _is_one_edit_away(first: str, second: str) -> bool:
+    """Check that strings differ by one insertion, deletion, substitution or transposition"""
+    if abs(len(first) - len(second)) > 1 or first == second:
+        return False
+
+    prefix = 0
+    while prefix < min(len(first), len(second)) and first[prefix] == second[prefix]:
+        prefix += 1
+    if len(first) == len(second):
+        if first[prefix + 1:] == second[prefix + 1:]:
+            return True
+        swapped = first[prefix:prefix + 2] == second[prefix:prefix + 2][::-1]
+        return swapped and first[prefix + 2:] == second[prefix + 2:]
+    longer, shorter = (first, second) if len(first) > len(second) else (second, first)
+    return longer[prefix + 1:] == shorter[prefix:]
+
+
+def _deletes(key: str) -> set[str]:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+class GroupMatch(NamedTuple):
+    group_id: int
+    title: str
+    rank: int  # 0 - same normalized title, 1 - prefix of title, 2 - title with typo
+
+    @property
+    def is_exact(self) -> bool:
+        return self.rank == _exact
+
+
+class GroupTitleIndex:
+    """
+    Index of normalized titles of groups: exact lookup by dict, prefix lookup by binary search
+    in sorted titles and lookup with one typo by deletes of titles (symmetric delete).
+    """
+
+    def __init__(self, groups: Iterable[tuple[int, str]]):
+        self._groups: dict[str, list[tuple[int, str]]] = {}
+        for group_id, title in groups:
+            self._groups.setdefault(normalize_group_title(title), []).append((group_id, title))
+        self._sorted_keys = sorted(self._groups)
+        self._deletes: dict[str, list[str]] = {}
+        for key in self._sorted_keys:
+            for variant in _deletes(key):
+                self._deletes.setdefault(variant, []).append(key)
+
+    def __len__(self) -> int:
+        return sum(map(len, self._groups.values()))
+
+    def search(self, title: str | None, *, limit: int = 8) -> list[GroupMatch]:
+        """Find groups by title, groups with the same normalized title are only returned if any"""
+        # Title is None for messages without text, e.g. stickers
+        query = normalize_group_title(title) if title else ''
+        if not query:
+            return []
+        if query in self._groups:
+            return self._matches(query, _exact)[:limit]
+
+        matches = []
+        if len(query) > 1:
+            position = bisect_left(self._sorted_keys, query)
+            for key in self._sorted_keys[position:position + limit]:
+                if not key.startswith(query):
+                    break
+                matches += self._matches(key, _prefix)
+
+        candidates = set()
+        for variant in (query, *_deletes(query)):
+            candidates.update(self._deletes.get(variant, ()))
+            if variant in self._groups:
+                candidates.add(variant)
+        for key in sorted(key for key in candidates if _is_one_edit_away(query, key)):
+            matches += self._matches(key, _fuzzy)
+
+        unique_matches: dict[int, GroupMatch] = {}
+        for match in matches:
+            unique_matches.setdefault(match.group_id, match)
+        return list(unique_matches.values())[:limit]
+
+    def _matches(self, key: str, rank: int) -> list[GroupMatch]:
+        return [GroupMatch(group_id, title, rank) for group_id, title in self._groups[key]]
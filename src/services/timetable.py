@@ -0,0 +1,59 @@
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Lessons of every week are aggregated to one document, weeks without lessons are stored too,
+# so renderers always find timetable of group by primary key
+_sql_rebuild_timetable = """
+    INSERT INTO group_timetable (group_id, week, group_title, lessons)
+    SELECT g.id, w.week, g.title, coalesce(
+        jsonb_agg(
+            jsonb_build_array(
+                l.day, l.number_lesson, d.title, coalesce(t.teachers, '[]'::jsonb),
+                l.type_and_location
+            ) ORDER BY l.day, l.number_lesson, l.id
+        ) FILTER (WHERE l.id IS NOT NULL),
+        '[]'::jsonb
+    )
+    FROM bot_groups AS g
+    CROSS JOIN (VALUES (1), (2)) AS w (week)
+    LEFT JOIN lesson_group AS lg ON lg.group_id = g.id
+    LEFT JOIN bot_lessons AS l ON l.id = lg.lesson_id AND l.week = w.week
+    LEFT JOIN bot_disciplines AS d ON d.id = l.discipline_id
+    LEFT JOIN LATERAL (
+        SELECT jsonb_agg(bt.full_name ORDER BY bt.id) AS teachers
+        FROM lesson_teacher AS lt JOIN bot_teachers AS bt ON bt.id = lt.teacher_id
+        WHERE lt.lesson_id = l.id
+    ) AS t ON true
+    WHERE g.id = ANY(:groups_id)
+    GROUP BY g.id, w.week, g.title
+    ON CONFLICT (group_id, week) DO UPDATE
+    SET group_title = excluded.group_title, lessons = excluded.lessons
+"""
+
+
+class TimetableLesson(NamedTuple):
+    day: int
+    number_lesson: int
+    discipline: str
+    teachers: tuple[str, ...]
+    type_and_location: str
+
+
+async def rebuild_group_timetable(group_id: int, *, session: AsyncSession) -> None:
+    """Rebuild timetable of group from lessons, transaction is not committed"""
+    await rebuild_groups_timetables([group_id], session=session)
+
+
+async def rebuild_groups_timetables(groups_id: list[int], *, session: AsyncSession) -> None:
+    """Rebuild timetables of several groups by one statement, transaction is not committed"""
+    await session.execute(text(_sql_rebuild_timetable), {'groups_id': groups_id})
+
+
+def load_timetable_lessons(lessons: list[list]) -> tuple[TimetableLesson, ...]:
+    """Convert lessons of timetable document to tuples"""
+    return tuple(
+        TimetableLesson(day, number_lesson, discipline, tuple(teachers), type_and_location)
+        for day, number_lesson, discipline, teachers, type_and_location in lessons
+    )
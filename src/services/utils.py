@@ -1,63 +1,112 @@
-from typing import Type
+from types import MappingProxyType
+from typing import Type, Any, NamedTuple, Sequence
 from datetime import date
 
-from aiogram import types
-from sqlalchemy import select
-from sqlalchemy.sql.selectable import Select
+from sqlalchemy import select, or_, UniqueConstraint
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from database.models import Base, User, Group, Department, Faculty
-
-
-async def get_or_create(
-        session: AsyncSession, class_model: Type[Base], sql: Select, **kwargs
-) -> (Type[Base], bool):
-    """Get or create model by class_model and sql for search instance"""
-    result = await session.execute(sql)
+from sqlalchemy.orm.attributes import set_committed_value
+
+from database.models import Base, User
+from services.cache import user_profile_cache, UserProfile
+
+lesson_times = MappingProxyType({
+    1: '8:30-10:05',
+    2: '10:25-12:00',
+    3: '12:20-13:55',
+    4: '14:15-15:50',
+    5: '16:10-17:45',
+    6: '18:05-19:40',
+    7: '19:50-21:25',
+})
+days_of_week = MappingProxyType({
+    1: 'Понеділок',
+    2: 'Вівторок',
+    3: 'Середа',
+    4: 'Четвер',
+    5: 'П\'ятниця',
+    6: 'Субота',
+    7: 'Неділя',
+})
+
+
+class Upserted(NamedTuple):
+    instance: Base
+    is_written: bool  # row was inserted or changed by statement
+
+
+_dialect_inserts = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def get_natural_key(class_model: Type[Base]) -> tuple[str, ...]:
+    """Get names of columns of first unique constraint of model, primary key otherwise"""
+    for constraint in class_model.__table__.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            return tuple(column.name for column in constraint.columns)
+    return tuple(column.name for column in class_model.__table__.primary_key)
+
+
+async def upsert(
+        class_model: Type[Base], values: dict[str, Any], *, session: AsyncSession,
+        key: Sequence[str] | None = None, update: Sequence[str] = ()
+) -> Upserted:
+    """
+    Insert row or get existing one by natural key with INSERT ... ON CONFLICT ... RETURNING.
+    Columns from `update` of existing row are overwritten by `values` if they differ.
+    Existing unchanged row is selected by second statement.
+    Transaction is not committed, this is responsibility of caller.
+    """
+    key = tuple(key or get_natural_key(class_model))
+    if not {*key, *update} <= values.keys():
+        raise ValueError(f'Values for {class_model.__name__} miss columns of {key} or {update}')
+
+    insert = _dialect_inserts[session.bind.dialect.name]
+    sql = insert(class_model).values(values)
+    if update:
+        sql = sql.on_conflict_do_update(
+            index_elements=key,
+            set_={name: sql.excluded[name] for name in update},
+            # Skipped update doesn't write row and doesn't return it
+            where=or_(*(
+                getattr(class_model, name).is_distinct_from(sql.excluded[name])
+                for name in update
+            ))
+        )
+    else:
+        sql = sql.on_conflict_do_nothing(index_elements=key)
+    result = await session.execute(sql.returning(class_model))
     instance = result.scalars().first()
     if instance is not None:
-        return instance, False
-    else:
-        instance = class_model(**kwargs)
-        await session.merge(instance)
-        await session.commit()
-        result = await session.execute(sql)
-        instance = result.scalars().first()
-        return instance, True
-
-
-async def is_model_exist_by_name(
-        title: str, *, class_model: Type[Group | Department | Faculty], session: AsyncSession
-) -> (bool, int):
-    """Check if model exist by title (work with Group, Department, Faculty)"""
-    sql = select(class_model).where(class_model.title == title)
-    result = await session.execute(sql)
-    instance_model = result.scalars().first()
-    return (
-        is_not_none := (instance_model is not None),
-        instance_model.id if is_not_none else 0
-    )
-
+        # Instance of updated row could be already loaded in session with old values
+        for name in update:
+            set_committed_value(instance, name, values[name])
+        return Upserted(instance, True)
 
-async def is_user_admin(msg: types.Message, *, session: AsyncSession) -> bool:
-    """Check if user is admin"""
-    sql = select(User).where(User.id == msg.from_user.id)
-    result = await session.execute(sql)
-    user: User = result.scalars().first()
+    sql_select = select(class_model).filter_by(**{name: values[name] for name in key})
+    result = await session.execute(sql_select)
+    return Upserted(result.scalars().one(), False)
 
-    if user is not None:
-        return user.is_admin
-    else:
-        return False
 
+async def get_user_profile(user_id: int, *, session: AsyncSession) -> UserProfile:
+    """Get registration status, group and admin flag of user in one lookup"""
+    profile = await user_profile_cache.get(user_id)
+    if profile is not None:
+        return profile
 
-async def is_registered_user(msg: types.Message, *, session: AsyncSession) -> bool:
-    """Check if user is registered in database"""
-    sql = select(User).where(User.id == msg.from_user.id)
+    sql = select(User.group_id, User.is_admin).where(User.id == user_id)
     result = await session.execute(sql)
-    user = result.scalars().first()
+    row = result.first()
+
+    if row is not None:
+        profile = UserProfile(user_id, True, row.group_id, row.is_admin)
+    else:
+        profile = UserProfile(user_id, False)
+    await user_profile_cache.set(profile)
 
-    return user is not None
+    return profile
 
 
 def get_current_week_number() -> int:
@@ -72,28 +121,12 @@ def get_current_week_number() -> int:
 
 def get_time_of_lesson_by_number(lesson_number: int) -> str:
     """Get time of lesson by number"""
-    return {
-        1: '8:30-10:05',
-        2: '10:25-12:00',
-        3: '12:20-13:55',
-        4: '14:15-15:50',
-        5: '16:10-17:45',
-        6: '18:05-19:40',
-        7: '19:50-21:25',
-    }[lesson_number]
+    return lesson_times[lesson_number]
 
 
 def get_day_of_week_by_number(day_number: int) -> str:
     """Get day of week by number"""
-    return {
-        1: 'Понеділок',
-        2: 'Вівторок',
-        3: 'Середа',
-        4: 'Четвер',
-        5: 'П\'ятниця',
-        6: 'Субота',
-        7: 'Неділя'
-    }[day_number]
+    return days_of_week[day_number]
 
 
 def get_current_day_and_week_of_schedule_number(
@@ -0,0 +1,93 @@
+import asyncio
+import hmac
+import signal
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from loguru import logger
+
+from config_loader import WebhookConfig
+
+_secret_token_header = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class SecretTokenRequestHandler(SimpleRequestHandler):
+    """
+    Request handler, which accepts only updates signed by secret token set with webhook.
+    Updates are handled after response, as Telegram redelivers update if response is late,
+    and answer returned by handler is sent through outbound queue, which may wait for limits.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str, **kwargs):
+        super().__init__(dispatcher, bot, **kwargs)
+        self.secret_token = secret_token
+        self._updates_in_progress: set[asyncio.Task] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(
+                request.headers.get(_secret_token_header, ''), self.secret_token
+        ):
+            return web.Response(status=401)
+
+        bot = await self.resolve_bot(request)
+        update = await request.json(loads=bot.session.json_loads)
+        task = asyncio.create_task(self._feed_update(bot, update))
+        self._updates_in_progress.add(task)
+        task.add_done_callback(self._updates_in_progress.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        # Shutdown of server waits for updates in progress
+        await asyncio.gather(*self._updates_in_progress, return_exceptions=True)
+        await super().close()
+
+    async def _feed_update(self, bot: Bot, update: dict) -> None:
+        try:
+            result = await self.dispatcher.feed_raw_update(bot, update, **self.data)
+            if isinstance(result, TelegramMethod):
+                await self.dispatcher.silent_call_request(bot, result)
+        except Exception:
+            logger.exception(f'Failed try handle update #{update.get("update_id")}')
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, config: WebhookConfig) -> web.Application:
+    """Create aiohttp application, which feeds updates posted by Telegram to dispatcher"""
+    app = web.Application()
+    handler = SecretTokenRequestHandler(dp, bot, config.secret_token)
+    handler.register(app, path=config.path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, config: WebhookConfig) -> None:
+    """Serve webhook until SIGINT or SIGTERM, then stop server gracefully"""
+    runner = web.AppRunner(create_webhook_app(dp, bot, config))
+    await runner.setup()
+    site = web.TCPSite(runner, config.host, config.port)
+    await site.start()
+    try:
+        # Pending updates are kept, they will be delivered to running replicas
+        await bot.set_webhook(
+            url=config.url.rstrip('/') + config.path,
+            secret_token=config.secret_token,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=False,
+        )
+        logger.info(f'Webhook is served on {config.host}:{config.port}{config.path}')
+        await _wait_stop_signal()
+    finally:
+        await runner.cleanup()
+
+
+async def _wait_stop_signal() -> None:
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(signal_number)
@@ -0,0 +1,62 @@
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from services.cache import (
+    LRUCache, RenderedScheduleCache, ScheduleCacheKey, UserProfileCache, UserProfile
+)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1 and cache.get('b') is None and cache.get('c') == 3
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(maxsize=2, ttl=-1)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None and len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_rendered_schedule_cache_is_shared_through_redis():
+    redis = FakeRedis()
+    first_process, second_process = RenderedScheduleCache(), RenderedScheduleCache()
+    first_process.setup(maxsize=16, ttl=60, redis=redis)
+    second_process.setup(maxsize=16, ttl=60, redis=redis)
+    key = ScheduleCacheKey(group_id=1, view='today', day=1, week=2)
+    other_group_key = ScheduleCacheKey(group_id=2, view='today', day=1, week=2)
+
+    await first_process.set(key, '<b>Пари сьогодні</b>')
+    await first_process.set(other_group_key, '<b>Інша група</b>')
+    assert await second_process.get(key) == '<b>Пари сьогодні</b>'
+
+    await first_process.invalidate_group(1)
+    first_process.clear_local()
+    second_process.clear_local()
+    assert await second_process.get(key) is None
+    assert await second_process.get(other_group_key) == '<b>Інша група</b>'
+
+
+@pytest.mark.asyncio
+async def test_user_profile_cache_is_shared_through_redis():
+    redis = FakeRedis()
+    first_process, second_process = UserProfileCache(), UserProfileCache()
+    first_process.setup(maxsize=16, ttl=60, redis=redis)
+    second_process.setup(maxsize=16, ttl=60, redis=redis)
+    student = UserProfile(user_id=1, is_registered=True, group_id=7)
+    stranger = UserProfile(user_id=2, is_registered=False)
+
+    await first_process.set(student)
+    await first_process.set(stranger)
+    assert await second_process.get(1) == student
+    assert await second_process.get(2) == stranger
+
+    await first_process.invalidate(1, 2)
+    second_process.clear_local()
+    assert await second_process.get(1) is None and await second_process.get(2) is None
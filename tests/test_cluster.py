@@ -0,0 +1,160 @@
+import asyncio
+import datetime
+from contextvars import ContextVar
+
+import pytest
+from aiogram import Bot, Dispatcher, Router, types
+from fakeredis.aioredis import FakeRedis
+
+from cluster import ClusterLock, UpdatesFrontend, UpdatesWorker, listen_cache_invalidation
+from cluster.invalidation import apply_cache_invalidation
+from cluster.updates import get_stream_key
+from config_loader import ClusterConfig
+from services.cache import (
+    RenderedScheduleCache, ScheduleCacheKey, schedule_cache, invalidation_channel
+)
+from services.hierarchy import hierarchy
+
+
+def _make_update(update_id: int, chat_id: int) -> types.Update:
+    return types.Update(
+        update_id=update_id,
+        message=types.Message(
+            message_id=update_id,
+            date=datetime.datetime.now(),
+            chat=types.Chat(id=chat_id, type='private'),
+            from_user=types.User(id=chat_id, is_bot=False, first_name='Тест'),
+            text=f'/today {update_id}',
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_workers_handle_updates_of_their_shards_in_order():
+    redis = FakeRedis()
+    shards = 2
+    updates = [_make_update(update_id, chat_id=update_id % 4) for update_id in range(1, 21)]
+    handled: list[tuple[int, int, int]] = []
+    shard_of_worker: ContextVar[int] = ContextVar('shard_of_worker')
+
+    router = Router()
+
+    @router.message()
+    async def handler(msg: types.Message) -> None:
+        await asyncio.sleep(0)
+        handled.append((shard_of_worker.get(), msg.chat.id, msg.message_id))
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot('42:TEST')
+
+    await UpdatesFrontend(redis, ClusterConfig(shards=shards)).publish(updates)
+
+    async def run_worker(shard: int) -> None:
+        shard_of_worker.set(shard)
+        config = ClusterConfig(shards=shards, shard=shard, batch_size=3, block_timeout=50)
+        await UpdatesWorker(redis, config).run(dp, bot)
+
+    async def wait_acknowledged() -> None:
+        while True:
+            # Consumer groups are surely created by workers, when updates are handled
+            if len(handled) == len(updates):
+                pending = [
+                    await redis.xpending(get_stream_key(shard), 'bot-workers')
+                    for shard in range(shards)
+                ]
+                if not any(info['pending'] for info in pending):
+                    return
+            await asyncio.sleep(0.02)
+
+    workers = [asyncio.create_task(run_worker(shard)) for shard in range(shards)]
+    try:
+        await asyncio.wait_for(wait_acknowledged(), 5)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await bot.session.close()
+
+    for chat_id in range(4):
+        chat_updates = [(shard, update_id) for shard, chat, update_id in handled if chat == chat_id]
+        assert {shard for shard, _ in chat_updates} == {chat_id % shards}
+        assert [update_id for _, update_id in chat_updates] == list(range(chat_id or 4, 21, 4))
+
+
+@pytest.mark.asyncio
+async def test_cluster_lock_is_owned_by_one_process():
+    redis = FakeRedis()
+    first_process = ClusterLock(redis, 'lock:test', ttl=60)
+    second_process = ClusterLock(redis, 'lock:test', ttl=60)
+
+    assert await first_process.acquire()
+    assert not await second_process.acquire()
+
+    await second_process.release()
+    assert not await second_process.acquire()
+
+    await first_process.release()
+    assert await second_process.acquire()
+
+
+@pytest.mark.asyncio
+async def test_cluster_lock_is_kept_alive_while_owner_works():
+    redis = FakeRedis()
+    first_process = ClusterLock(redis, 'lock:test', ttl=0.3)
+    second_process = ClusterLock(redis, 'lock:test', ttl=0.3)
+
+    assert await first_process.acquire()
+    async with first_process.keep_alive():
+        await asyncio.sleep(0.5)
+        assert not await second_process.acquire()
+
+    await asyncio.sleep(0.4)
+    assert await second_process.acquire()
+
+
+@pytest.fixture
+def restore_schedule_cache():
+    """Global cache is set up by test, its previous setup is restored after test"""
+    state = vars(schedule_cache).copy()
+    yield
+    vars(schedule_cache).update(state)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('restore_schedule_cache')
+async def test_cache_invalidation_is_broadcast_to_other_processes():
+    redis = FakeRedis()
+    other_process_cache = RenderedScheduleCache()
+    other_process_cache.setup(maxsize=16, ttl=60, redis=redis)
+    schedule_cache.setup(maxsize=16, ttl=60)
+    key = ScheduleCacheKey(group_id=1, view='today', day=1, week=1)
+    await schedule_cache.set(key, '<b>Пари сьогодні</b>')
+
+    listener = asyncio.create_task(listen_cache_invalidation(redis))
+    try:
+        await asyncio.sleep(0.1)
+        # Malformed message is skipped, listener keeps applying next ones
+        await redis.publish(invalidation_channel, 'schedule:not-a-number')
+        await other_process_cache.invalidate_group(1)
+        for _ in range(50):
+            if await schedule_cache.get(key) is None:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+    assert await schedule_cache.get(key) is None
+
+
+def test_own_invalidation_of_hierarchy_is_skipped(monkeypatch):
+    snapshot = object()
+    monkeypatch.setattr(hierarchy, '_snapshot', snapshot)
+    monkeypatch.setattr(hierarchy, '_version', 0)
+
+    apply_cache_invalidation(f'hierarchy:{hierarchy.process_id}')
+    assert hierarchy._snapshot is snapshot
+
+    apply_cache_invalidation('hierarchy:other-process')
+    assert hierarchy._snapshot is None
@@ -0,0 +1,20 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config_loader import DatabaseConfig
+from database.base import get_sqlalchemy_url, get_engine_options
+
+_config_db = DatabaseConfig(
+    host='localhost', db_name='schedule', user='bot', password='secret',
+    pool_size=3, max_overflow=1, statement_cache_size=250
+)
+
+
+def test_pool_and_statement_cache_are_configured():
+    url = get_sqlalchemy_url(_config_db)
+    engine = create_async_engine(url, **get_engine_options(_config_db))
+
+    assert make_url(url).query == {'prepared_statement_cache_size': '250'}
+    assert engine.pool.size() == 3 and engine.pool._max_overflow == 1
+    assert engine.pool._pre_ping
+
@@ -0,0 +1,42 @@
+from keyboards.kb_with_groups import get_keyboard_with_groups
+from services.hierarchy import HierarchySnapshot, FacultyNode, DepartmentNode, GroupNode
+
+_faculty = FacultyNode(1, 'Інженерно-хімічний факультет', 'ІХФ')
+_department = DepartmentNode(
+    2, 'Технічних та програмних засобів автоматизації', 'ТПЗА', _faculty.id, _faculty
+)
+_other_department = DepartmentNode(
+    3, 'Кібернетики хіміко-технологічних процесів', 'КХТП', _faculty.id, _faculty
+)
+_groups = [
+    GroupNode(10, 'ЛА-п11', 'http://epi.kpi.ua/1', _department.id, _department),
+    GroupNode(11, 'ЛА-п11', 'http://epi.kpi.ua/2', _other_department.id, _other_department),
+    GroupNode(12, 'ЛА-п12', 'http://epi.kpi.ua/3', _department.id, _department),
+]
+
+
+def _make_snapshot() -> HierarchySnapshot:
+    return HierarchySnapshot(1, [_faculty], [_department, _other_department], _groups)
+
+
+def test_hierarchy_is_looked_up_by_titles_and_ids():
+    snapshot = _make_snapshot()
+
+    assert snapshot.faculty_by_title('Інженерно-хімічний факультет') == _faculty
+    assert snapshot.department_by_title('Технічних та програмних засобів автоматизації') == (
+        _department
+    )
+    assert snapshot.groups_by_title('ЛА-п11') == (_groups[0], _groups[1])
+    assert snapshot.group_by_title('ЛА-п11', department_id=_other_department.id) == _groups[1]
+    assert snapshot.group(12, department_id=_department.id) == _groups[2]
+    assert snapshot.group(12, department_id=_other_department.id) is None
+    assert snapshot.faculty_by_title('test') is None
+
+
+def test_found_groups_are_shown_on_keyboard_without_database():
+    is_exact, groups = _make_snapshot().search_groups('ла п12')
+    keyboard = get_keyboard_with_groups(groups)
+
+    assert is_exact and groups == [_groups[2]]
+    assert keyboard.inline_keyboard[0][0].text == 'ТПЗА (ІХФ)'
+    assert keyboard.inline_keyboard[0][0].callback_data == 'group select 12'
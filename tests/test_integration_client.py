@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from parser.datatypes import LessonTuple
+from services.admin import create_faculty, create_department, create_group, delete_faculty
+from services.client import _render_lessons_of_week, _render_lessons_of_day
+from services.ingestion import ingest_schedule
+
+# Timetable of group by primary key
+_statements_per_render = 1
+
+
+def _make_schedule(lessons_count: int) -> list[LessonTuple]:
+    return [
+        LessonTuple(
+            f'Дисципліна {i}', [f'Викладач {i} А', f'Викладач {i} Б'], f'ауд. {i}',
+            week=1, day_number=i % 6 + 1, lesson_number=i // 6 % 5 + 1
+        )
+        for i in range(lessons_count)
+    ]
+
+
+@contextmanager
+def _count_statements(session: AsyncSession):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.mark.asyncio
+async def test_render_statements_count_does_not_depend_on_lessons_count(get_sessionmaker):
+    async with get_sessionmaker() as session:
+        faculty = await create_faculty('Тестовий факультет рендеру', 'ТФР', session=session)
+        department = await create_department(
+            faculty.id, 'Тестова кафедра рендеру', 'ТКР', session=session
+        )
+        small_group = await create_group(
+            department.id, 'ТР-01', 'http://epi.kpi.ua', session=session
+        )
+        big_group = await create_group(
+            department.id, 'ТР-02', 'http://epi.kpi.ua', session=session
+        )
+        await ingest_schedule(small_group.id, _make_schedule(2), session=session)
+        await ingest_schedule(big_group.id, _make_schedule(30), session=session)
+        await session.commit()
+
+        counts = []
+        for group in (small_group, big_group):
+            session.expunge_all()
+            with _count_statements(session) as statements:
+                await _render_lessons_of_week(group.id, 1, next_week=False, session=session)
+            counts.append(len(statements))
+
+            session.expunge_all()
+            with _count_statements(session) as statements:
+                await _render_lessons_of_day(group.id, 1, 1, tomorrow=False, session=session)
+            counts.append(len(statements))
+
+        await delete_faculty(faculty.id, session=session)
+
+    assert counts == [_statements_per_render] * 4
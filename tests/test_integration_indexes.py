@@ -0,0 +1,129 @@
+import json
+
+import pytest
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import (
+    User, Faculty, Department, Group, Discipline, Lesson, Teacher, lesson_group, lesson_teacher
+)
+from services.client import _select_group_schedule
+
+_groups_count = 2000
+_lessons_per_group = 12
+_first_id = 900_000
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+    ))
+
+
+def _find_seq_scans(plan: dict) -> list[str]:
+    relations = []
+    if plan['Node Type'] == 'Seq Scan':
+        relations.append(plan['Relation Name'])
+    for subplan in plan.get('Plans', ()):
+        relations += _find_seq_scans(subplan)
+    return relations
+
+
+async def _explain(session: AsyncSession, statement) -> list[str]:
+    result = await session.execute(text(f'EXPLAIN (FORMAT JSON) {_compile(statement)}'))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return _find_seq_scans(plan[0]['Plan'])
+
+
+async def _populate(session: AsyncSession) -> None:
+    faculty_id = department_id = _first_id
+    await session.execute(insert(Faculty).values(
+        id=faculty_id, title='Факультет індексів', title_short='ФІ'
+    ))
+    await session.execute(insert(Department).values(
+        id=department_id, title='Кафедра індексів', title_short='КІ', faculty_id=faculty_id
+    ))
+
+    groups, users, lessons, disciplines, teachers = [], [], [], [], []
+    group_links, teacher_links = [], []
+    for i in range(_groups_count):
+        group_id = _first_id + i
+        groups.append({
+            'id': group_id, 'title': f'ІН-{i}', 'department_id': department_id,
+            'schedule_url': 'http://epi.kpi.ua'
+        })
+        users.append({'id': _first_id + i, 'group_id': group_id, 'is_admin': False})
+        for j in range(_lessons_per_group):
+            lesson_id = _first_id + i * _lessons_per_group + j
+            disciplines.append({'id': lesson_id, 'title': f'Дисципліна індексів {lesson_id}'})
+            teachers.append({'id': lesson_id, 'full_name': f'Викладач індексів {lesson_id}'})
+            lessons.append({
+                'id': lesson_id, 'discipline_id': lesson_id, 'week': j % 2 + 1,
+                'day': j // 2 % 6 + 1, 'number_lesson': i % 5 + 1, 'type_and_location': '-'
+            })
+            group_links.append({'lesson_id': lesson_id, 'group_id': group_id})
+            teacher_links.append({'lesson_id': lesson_id, 'teacher_id': lesson_id})
+
+    await session.execute(insert(Group), groups)
+    await session.execute(insert(User), users)
+    await session.execute(insert(Discipline), disciplines)
+    await session.execute(insert(Teacher), teachers)
+    await session.execute(insert(Lesson), lessons)
+    await session.execute(insert(lesson_group), group_links)
+    await session.execute(insert(lesson_teacher), teacher_links)
+    await session.commit()
+
+    for table in ('bot_groups', 'bot_users', 'bot_lessons', 'bot_teachers',
+                  'lesson_group', 'lesson_teacher'):
+        await session.execute(text(f'ANALYZE {table}'))
+
+
+async def _cleanup(session: AsyncSession) -> None:
+    last_id = _first_id + _groups_count * _lessons_per_group
+    await session.execute(delete(lesson_teacher).where(lesson_teacher.c.lesson_id >= _first_id))
+    await session.execute(delete(lesson_group).where(lesson_group.c.group_id >= _first_id))
+    await session.execute(delete(Lesson).where(Lesson.id.between(_first_id, last_id)))
+    await session.execute(delete(Teacher).where(Teacher.id.between(_first_id, last_id)))
+    await session.execute(delete(Discipline).where(Discipline.id.between(_first_id, last_id)))
+    await session.execute(delete(User).where(User.id >= _first_id))
+    await session.execute(delete(Group).where(Group.department_id == _first_id))
+    await session.execute(delete(Department).where(Department.id == _first_id))
+    await session.execute(delete(Faculty).where(Faculty.id == _first_id))
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_do_not_use_seq_scan(get_sessionmaker):
+    group_id = _first_id + _groups_count // 2
+    hot_queries = {
+        'week schedule': _select_group_schedule(group_id, week=1),
+        'day schedule': _select_group_schedule(group_id, week=1, day=2),
+        'teachers of lessons': select(Teacher).join(
+            lesson_teacher, lesson_teacher.c.teacher_id == Teacher.id
+        ).where(lesson_teacher.c.lesson_id.in_([_first_id, _first_id + 1])),
+        'lessons of teacher': select(lesson_teacher).where(
+            lesson_teacher.c.teacher_id == _first_id
+        ),
+        'lessons by time': select(Lesson.id).where(
+            Lesson.week == 1, Lesson.day == 2, Lesson.number_lesson == 1
+        ),
+        'group by title': select(Group).where(Group.title == f'ІН-{_groups_count // 2}'),
+        'users of group': select(User).where(User.group_id == group_id),
+        'delete group lessons': delete(lesson_group).where(lesson_group.c.group_id == group_id),
+        'delete group users': delete(User).where(User.group_id == group_id),
+    }
+
+    async with get_sessionmaker() as session:
+        await _populate(session)
+        try:
+            seq_scans = {
+                name: await _explain(session, statement) for name, statement in hot_queries.items()
+            }
+        finally:
+            await session.rollback()
+            await _cleanup(session)
+
+    assert {name: relations for name, relations in seq_scans.items() if relations} == {}
@@ -0,0 +1,182 @@
+import pytest
+from sqlalchemy import select
+
+from config_loader import GarbageCollectorConfig
+from database.models import GroupTimetable
+from parser.datatypes import LessonTuple
+from services.admin import (
+    create_faculty, create_department, create_group, delete_faculty, DeletionReport
+)
+from services.ingestion import ingest_schedule, IngestionReport
+from services.garbage_collector import GarbageCollector, GarbageReport
+
+_schedule = [
+    LessonTuple('Вища математика', ['Іваненко Іван Іванович'], 'Лек ауд. 101', 1, 1, 1),
+    LessonTuple('Вища математика', ['Петренко Петро Петрович'], 'Прак ауд. 102', 1, 1, 1),
+    LessonTuple('Фізика', [], 'Немає інформації', 1, 2, 3),
+    LessonTuple('Фізика', ['Іваненко Іван Іванович'], 'Лаб ауд. 103', 2, 4, 2),
+]
+
+
+@pytest.mark.asyncio
+async def test_ingest_schedule_is_idempotent(get_sessionmaker):
+    async with get_sessionmaker() as session:
+        faculty = await create_faculty('Тестовий факультет інжесту', 'ТФІ', session=session)
+        department = await create_department(
+            faculty.id, 'Тестова кафедра інжесту', 'ТКІ', session=session
+        )
+        group = await create_group(department.id, 'ТІ-01', 'http://epi.kpi.ua', session=session)
+
+        first_report: IngestionReport = await ingest_schedule(
+            group.id, _schedule, session=session
+        )
+        await session.commit()
+        second_report: IngestionReport = await ingest_schedule(
+            group.id, _schedule, session=session
+        )
+        await session.commit()
+        third_report: IngestionReport = await ingest_schedule(
+            group.id, _schedule[:2], session=session
+        )
+        await session.commit()
+
+        await delete_faculty(faculty.id, session=session)
+
+    # 2 disciplines, 2 teachers, 3 lessons, 3 teacher links and 3 group links
+    assert first_report.inserted + first_report.matched + first_report.unchanged == 13
+    assert second_report == IngestionReport(
+        inserted=0, matched=7, unchanged=6, removed=0, updated=0, groups=(group.id,)
+    )
+    assert third_report.inserted == 0 and third_report.removed == 2
+
+
+@pytest.mark.asyncio
+async def test_changed_location_and_teachers_of_lesson_are_written(get_sessionmaker):
+    changed_schedule = [
+        LessonTuple('Фізика', ['Петренко Петро Петрович'], 'Лаб ауд. 104', 2, 4, 2),
+    ]
+    async with get_sessionmaker() as session:
+        faculty = await create_faculty('Тестовий факультет змін', 'ТФЗМ', session=session)
+        department = await create_department(
+            faculty.id, 'Тестова кафедра змін', 'ТКЗМ', session=session
+        )
+        group = await create_group(department.id, 'ТЗМ-01', 'http://epi.kpi.ua', session=session)
+        await ingest_schedule(group.id, _schedule[3:], session=session)
+        report: IngestionReport = await ingest_schedule(
+            group.id, changed_schedule, session=session
+        )
+        await session.commit()
+
+        sql = select(GroupTimetable.lessons).where(
+            GroupTimetable.group_id == group.id, GroupTimetable.week == 2
+        )
+        lessons = (await session.execute(sql)).scalar_one()
+        await delete_faculty(faculty.id, session=session)
+
+    assert report.updated == 1 and report.removed == 1
+    assert lessons == [[4, 2, 'Фізика', ['Петренко Петро Петрович'], 'Лаб ауд. 104']]
+
+
+@pytest.mark.asyncio
+async def test_timetables_of_groups_sharing_lesson_are_rebuilt(get_sessionmaker):
+    async with get_sessionmaker() as session:
+        faculty = await create_faculty('Тестовий факультет спільних пар', 'ТФС', session=session)
+        department = await create_department(
+            faculty.id, 'Тестова кафедра спільних пар', 'ТКС', session=session
+        )
+        first_group = await create_group(
+            department.id, 'ТС-01', 'http://epi.kpi.ua', session=session
+        )
+        second_group = await create_group(
+            department.id, 'ТС-02', 'http://epi.kpi.ua', session=session
+        )
+        await ingest_schedule(second_group.id, _schedule[:1], session=session)
+        report: IngestionReport = await ingest_schedule(
+            first_group.id, _schedule[:2], session=session
+        )
+        await session.commit()
+
+        sql = select(GroupTimetable.lessons).where(
+            GroupTimetable.group_id == second_group.id, GroupTimetable.week == 1
+        )
+        second_group_lessons = (await session.execute(sql)).scalar_one()
+        await delete_faculty(faculty.id, session=session)
+
+    # Teacher of second subgroup was linked to lesson by schedule of first group
+    assert report.groups == tuple(sorted((first_group.id, second_group.id)))
+    assert second_group_lessons[0][3] == ['Іваненко Іван Іванович', 'Петренко Петро Петрович']
+
+
+@pytest.mark.asyncio
+async def test_schedule_of_group_keeps_details_of_lesson_shared_with_other(get_sessionmaker):
+    async with get_sessionmaker() as session:
+        faculty = await create_faculty('Тестовий факультет спільних змін', 'ТФСЗ', session=session)
+        department = await create_department(
+            faculty.id, 'Тестова кафедра спільних змін', 'ТКСЗ', session=session
+        )
+        first_group = await create_group(
+            department.id, 'ТСЗ-01', 'http://epi.kpi.ua', session=session
+        )
+        second_group = await create_group(
+            department.id, 'ТСЗ-02', 'http://epi.kpi.ua', session=session
+        )
+        await ingest_schedule(first_group.id, _schedule[:1], session=session)
+        await ingest_schedule(second_group.id, _schedule[1:2], session=session)
+        await session.commit()
+        report: IngestionReport = await ingest_schedule(
+            second_group.id, _schedule[1:2], session=session
+        )
+        await session.commit()
+
+        sql = select(GroupTimetable.lessons).where(
+            GroupTimetable.group_id == first_group.id, GroupTimetable.week == 1
+        )
+        first_group_lessons = (await session.execute(sql)).scalar_one()
+        await delete_faculty(faculty.id, session=session)
+
+    # Teacher and location of first group are not removed by schedule of second one
+    assert report.removed == 0 and report.updated == 0
+    assert first_group_lessons == [[1, 1, 'Вища математика', [
+        'Іваненко Іван Іванович', 'Петренко Петро Петрович'
+    ], 'Лек ауд. 101']]
+
+
+@pytest.mark.asyncio
+async def test_faculty_is_deleted_with_structure_and_orphaned_lessons(get_sessionmaker):
+    async with get_sessionmaker() as session:
+        faculty = await create_faculty('Тестовий факультет видалення', 'ТФВ', session=session)
+        department = await create_department(
+            faculty.id, 'Тестова кафедра видалення', 'ТКВ', session=session
+        )
+        for title in ('ТВ-01', 'ТВ-02'):
+            group = await create_group(department.id, title, 'http://epi.kpi.ua', session=session)
+            await ingest_schedule(group.id, _schedule, session=session)
+        await session.commit()
+
+        report: DeletionReport = await delete_faculty(faculty.id, session=session)
+
+    # Lessons are shared by both groups and are deleted once
+    assert report == DeletionReport(faculties=1, departments=1, groups=2, users=0, lessons=3)
+
+
+@pytest.mark.asyncio
+async def test_lessons_removed_from_schedule_are_collected_by_batches(get_sessionmaker):
+    async with get_sessionmaker() as session:
+        faculty = await create_faculty('Тестовий факультет збирання', 'ТФЗ', session=session)
+        department = await create_department(
+            faculty.id, 'Тестова кафедра збирання', 'ТКЗ', session=session
+        )
+        group = await create_group(department.id, 'ТЗ-01', 'http://epi.kpi.ua', session=session)
+        await ingest_schedule(group.id, _schedule, session=session)
+        await ingest_schedule(group.id, _schedule[:2], session=session)
+        await session.commit()
+
+        garbage_collector = GarbageCollector(
+            get_sessionmaker, GarbageCollectorConfig(True, 60, batch_size=1, batch_pause=0)
+        )
+        report: GarbageReport = await garbage_collector.collect()
+        await delete_faculty(faculty.id, session=session)
+
+    # Lessons of physics are not used anymore, so is discipline, teacher has other lesson
+    assert report.lessons >= 2 and report.disciplines >= 1
+    assert report.batches == sum(report[:3]) + 3
@@ -0,0 +1,14 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.base import get_sqlalchemy_url, warm_up_pool
+
+
+@pytest.mark.asyncio
+async def test_warm_up_pool_opens_pool_size_connections():
+    engine = create_async_engine(get_sqlalchemy_url(), pool_size=3)
+    try:
+        await warm_up_pool(engine, 3)
+        assert engine.pool.checkedin() == 3
+    finally:
+        await engine.dispose()
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, SendMessage, AnswerCallbackQuery
+
+from config_loader import OutboundConfig
+from outbound import OutboundQueue, OutboundMiddleware, TokenBucket, bulk_sends
+
+
+class FakeTelegram:
+    """Records time and chat of requests, answers with flood control when asked"""
+
+    def __init__(self, flood_control: int = 0):
+        self.sent: list[tuple[float, int | str, str]] = []
+        self.flood_control = flood_control
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def make_request(self, bot: Bot, method) -> Response:
+        await self.gate.wait()
+        if self.flood_control:
+            self.flood_control -= 1
+            raise TelegramRetryAfter(method, 'Too Many Requests', retry_after=1)
+        self.sent.append((asyncio.get_running_loop().time(), method.chat_id, method.text))
+        return Response(ok=True, result=True)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_and_then_rate():
+    bucket = TokenBucket(rate=10, capacity=2)
+    bucket.take()
+    bucket.take()
+
+    assert 0.09 < bucket.delay() <= 0.1
+    bucket.block(5)
+    assert 4.9 < bucket.delay() <= 5
+
+
+@pytest.mark.asyncio
+async def test_requests_to_chat_are_rate_limited_in_order():
+    telegram = FakeTelegram()
+    queue = OutboundQueue(OutboundConfig(global_rate=1000, chat_rate=20, chat_burst=1))
+    queue.start()
+    bot = Bot('42:TEST')
+    try:
+        await asyncio.gather(*(
+            queue.submit(telegram.make_request, bot, SendMessage(chat_id=chat_id, text=str(i)))
+            for i in range(5) for chat_id in (1, 2)
+        ))
+    finally:
+        await queue.close()
+        await bot.session.close()
+
+    for chat_id in (1, 2):
+        chat_sent = [(time, text) for time, chat, text in telegram.sent if chat == chat_id]
+        assert [text for _, text in chat_sent] == ['0', '1', '2', '3', '4']
+        # 5 requests with 20 requests per second and no burst
+        assert chat_sent[-1][0] - chat_sent[0][0] >= 4 / 20 - 0.01
+    assert queue.stats.sent == 10 and queue.stats.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_request_is_retried_after_flood_control():
+    telegram = FakeTelegram(flood_control=1)
+    queue = OutboundQueue(OutboundConfig())
+    queue.start()
+    bot = Bot('42:TEST')
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        response = await queue.submit(
+            telegram.make_request, bot, SendMessage(chat_id=1, text='Пари сьогодні')
+        )
+    finally:
+        await queue.close()
+        await bot.session.close()
+
+    assert response.result is True
+    assert telegram.sent[0][0] - started >= 1
+    assert queue.stats.retried == 1 and queue.stats.failed == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_replies_are_sent_before_bulk():
+    telegram = FakeTelegram()
+    telegram.gate.clear()
+    queue = OutboundQueue(OutboundConfig(global_rate=1000, senders=1))
+    queue.start()
+    bot = Bot('42:TEST')
+
+    async def send_bulk(chat_id: int) -> None:
+        with bulk_sends():
+            await queue.submit(
+                telegram.make_request, bot, SendMessage(chat_id=chat_id, text='bulk')
+            )
+
+    try:
+        bulk = [asyncio.create_task(send_bulk(chat_id)) for chat_id in range(1, 5)]
+        await asyncio.sleep(0.01)
+        reply = asyncio.create_task(
+            queue.submit(telegram.make_request, bot, SendMessage(chat_id=10, text='reply'))
+        )
+        await asyncio.sleep(0.01)
+        assert queue.stats.queued == 4 and queue.stats.in_flight == 1
+        telegram.gate.set()
+        await asyncio.gather(reply, *bulk)
+    finally:
+        await queue.close()
+        await bot.session.close()
+
+    # First bulk request was already in flight, when reply was submitted
+    assert [text for _, _, text in telegram.sent] == ['bulk', 'reply', 'bulk', 'bulk', 'bulk']
+
+
+@pytest.mark.asyncio
+async def test_middleware_queues_only_requests_to_chats():
+    telegram = FakeTelegram()
+    queue = OutboundQueue(OutboundConfig())
+    queue.start()
+    middleware = OutboundMiddleware(queue)
+    bot = Bot('42:TEST')
+    other_requests = []
+
+    async def make_request(bot: Bot, method) -> Response:
+        if isinstance(method, SendMessage):
+            return await telegram.make_request(bot, method)
+        other_requests.append(method)
+        return Response(ok=True, result=True)
+
+    try:
+        await middleware(make_request, bot, SendMessage(chat_id=1, text='Пари сьогодні'))
+        await middleware(make_request, bot, AnswerCallbackQuery(callback_query_id='1'))
+    finally:
+        await queue.close()
+        await bot.session.close()
+
+    assert queue.stats.sent == 1 and len(other_requests) == 1
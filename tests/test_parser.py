@@ -0,0 +1,143 @@
+import os
+from pathlib import Path
+from timeit import timeit
+
+import pytest
+import pytest_asyncio
+from aiohttp import web, ClientResponseError
+from aiohttp.test_utils import TestServer
+
+from config_loader import load_config_parser
+from database.models import Group
+from parser.client import ScheduleClient
+from parser.datatypes import ScheduleFingerprint
+from parser.executor import ParserExecutor
+from parser.parsing import fetch_schedule_tables, parse_lessons
+from services.admin import add_information_from_schedule_to_db
+
+_fixtures = Path(__file__).parent / 'fixtures'
+_schedule_page = (_fixtures / 'schedule_la_p11.html').read_bytes()
+_schedule_pages = sorted(_fixtures.glob('schedule_*.html'))
+
+# Timings depend on runner, so benchmark only reports them and is run on demand
+benchmark = pytest.mark.skipif(
+    not os.getenv('RUN_BENCHMARKS'), reason='benchmarks are run with RUN_BENCHMARKS=1'
+)
+
+
+async def _page_with_etag(request: web.Request) -> web.Response:
+    if request.headers.get('If-None-Match') == '"v1"':
+        return web.Response(status=304, headers={'ETag': '"v1"'})
+    return web.Response(body=_schedule_page, headers={'ETag': '"v1"'}, content_type='text/html')
+
+
+async def _page_without_validators(request: web.Request) -> web.Response:
+    # View state of ASP.NET page is changed on every response
+    body = _schedule_page.replace(b'/wEPDwUKMTk', f'/wEPDwUKMTk{id(request)}'.encode())
+    return web.Response(body=body, content_type='text/html')
+
+
+async def _unavailable_page(request: web.Request) -> web.Response:
+    return web.Response(status=503, text='Service Unavailable', content_type='text/html')
+
+
+@pytest_asyncio.fixture
+async def schedule_server():
+    app = web.Application()
+    app.router.add_get('/etag', _page_with_etag)
+    app.router.add_get('/plain', _page_without_validators)
+    app.router.add_get('/unavailable', _unavailable_page)
+    async with TestServer(app) as server:
+        yield server
+
+
+@pytest.mark.asyncio
+async def test_fetch_schedule_tables_uses_validators(schedule_server):
+    url = str(schedule_server.make_url('/etag'))
+    async with ScheduleClient() as client:
+        first = await fetch_schedule_tables(url, client=client)
+        second = await fetch_schedule_tables(url, fingerprint=first.fingerprint, client=client)
+
+    assert first.modified and first.lessons and first.fingerprint.etag == '"v1"'
+    assert not second.modified and second.lessons is None
+    assert second.fingerprint == first.fingerprint
+
+
+@pytest.mark.asyncio
+async def test_fetch_schedule_tables_compares_tables_hash(schedule_server):
+    url = str(schedule_server.make_url('/plain'))
+    async with ScheduleClient() as client:
+        first = await fetch_schedule_tables(url, client=client)
+        second = await fetch_schedule_tables(url, fingerprint=first.fingerprint, client=client)
+        changed = await fetch_schedule_tables(
+            url, fingerprint=ScheduleFingerprint(content_hash='outdated'), client=client
+        )
+
+    assert first.modified and first.fingerprint.etag is None
+    assert not second.modified and second.lessons is None
+    assert changed.modified and changed.lessons == first.lessons
+
+
+@pytest.mark.asyncio
+async def test_fetch_schedule_tables_raises_on_error_status(schedule_server):
+    url = str(schedule_server.make_url('/unavailable'))
+    async with ScheduleClient() as client:
+        with pytest.raises(ClientResponseError) as error:
+            await fetch_schedule_tables(url, client=client)
+
+    assert error.value.status == 503
+
+
+@pytest.mark.parametrize('path', _schedule_pages, ids=lambda path: path.stem)
+def test_parsing_backends_are_equivalent(path: Path):
+    data = path.read_bytes()
+    lessons = parse_lessons(data, 'bs4')
+
+    assert lessons
+    assert parse_lessons(data, 'lxml') == lessons
+
+
+@pytest.mark.asyncio
+async def test_schedule_of_group_is_not_added_from_error_page(schedule_server):
+    group = Group(id=1, title='ТП-01', schedule_url=str(schedule_server.make_url('/unavailable')))
+    async with ScheduleClient() as client:
+        # Session is not used, error page is not ingested
+        is_added = await add_information_from_schedule_to_db(
+            group, session=None, schedule_client=client
+        )
+
+    assert not is_added
+
+
+@benchmark
+@pytest.mark.parametrize('path', _schedule_pages, ids=lambda path: path.stem)
+def test_parsing_backends_benchmark(path: Path):
+    data = path.read_bytes()
+    number = 20
+    bs4_time = timeit(lambda: parse_lessons(data, 'bs4'), number=number) / number
+    lxml_time = timeit(lambda: parse_lessons(data, 'lxml'), number=number) / number
+    print(f'\n{path.stem}: bs4 {bs4_time * 1000:.2f} ms, lxml {lxml_time * 1000:.2f} ms per page')
+
+
+def test_unknown_parsing_backend_is_rejected_by_config(monkeypatch):
+    monkeypatch.setenv('PARSER_BACKEND', 'html5lib')
+
+    with pytest.raises(ValueError, match='PARSER_BACKEND'):
+        load_config_parser()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('kind', ['process', 'thread', 'none'])
+async def test_parser_executor_measures_time(kind: str):
+    executor = ParserExecutor(kind, workers=1)
+    try:
+        lessons = await executor.run(parse_lessons, _schedule_page, 'lxml')
+    finally:
+        executor.shutdown()
+
+    assert lessons == parse_lessons(_schedule_page, 'lxml')
+    assert executor.stats.calls == 1
+    if kind == 'none':
+        assert executor.stats.loop_seconds > 0 and executor.stats.pool_seconds == 0
+    else:
+        assert 0 < executor.stats.pool_seconds <= executor.stats.wait_seconds
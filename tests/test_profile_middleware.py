@@ -0,0 +1,71 @@
+import datetime
+from contextlib import asynccontextmanager
+
+import pytest
+from aiogram import Bot, Dispatcher, Router, types
+from aiogram.filters import Command
+
+from filters import IsRegistered, IsAdmin
+from middlewares import DbSessionMiddleware, UserProfileMiddleware
+from services.cache import user_profile_cache, UserProfile
+
+
+@asynccontextmanager
+async def _session_pool():
+    yield None
+
+
+def _make_update(user_id: int, text: str) -> types.Update:
+    return types.Update(
+        update_id=1,
+        message=types.Message(
+            message_id=1,
+            date=datetime.datetime.now(),
+            chat=types.Chat(id=user_id, type='private'),
+            from_user=types.User(id=user_id, is_bot=False, first_name='Тест'),
+            text=text,
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_profile_is_injected_and_drives_filters():
+    router = Router()
+    handled = []
+
+    @router.message(Command('cmds'), IsAdmin())
+    async def admin_handler(msg: types.Message, user: UserProfile) -> None:
+        handled.append(('admin', user))
+
+    @router.message(Command('today'), IsRegistered())
+    async def registered_handler(msg: types.Message, user: UserProfile) -> None:
+        handled.append(('registered', user))
+
+    @router.message(~IsRegistered())
+    async def not_registered_handler(msg: types.Message, user: UserProfile) -> None:
+        handled.append(('not registered', user))
+
+    dp = Dispatcher()
+    dp.update.middleware(DbSessionMiddleware(session_pool=_session_pool))
+    dp.update.middleware(UserProfileMiddleware())
+    dp.include_router(router)
+    bot = Bot('42:TEST')
+
+    student = UserProfile(user_id=1, is_registered=True, group_id=7)
+    stranger = UserProfile(user_id=2, is_registered=False)
+    admin = UserProfile(user_id=3, is_registered=True, group_id=7, is_admin=True)
+    for profile in (student, stranger, admin):
+        await user_profile_cache.set(profile)
+
+    try:
+        await dp.feed_update(bot, _make_update(1, '/cmds'))
+        await dp.feed_update(bot, _make_update(1, '/today'))
+        await dp.feed_update(bot, _make_update(2, '/today'))
+        await dp.feed_update(bot, _make_update(3, '/cmds'))
+    finally:
+        user_profile_cache.clear_local()
+        await bot.session.close()
+
+    assert handled == [
+        ('registered', student), ('not registered', stranger), ('admin', admin)
+    ]
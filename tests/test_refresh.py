@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from config_loader import load_config_refresh
+from services.refresh import HostRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_host_rate_limiter_spreads_requests_per_host():
+    rate_limiter = HostRateLimiter(rate=50)
+    loop = asyncio.get_running_loop()
+    time_start = loop.time()
+
+    await asyncio.gather(*(
+        rate_limiter.wait('http://epi.kpi.ua/Schedules/ViewSchedule.aspx') for _ in range(5)
+    ))
+    assert loop.time() - time_start >= 4 / 50
+
+    time_start = loop.time()
+    await rate_limiter.wait('http://other.kpi.ua/')
+    assert loop.time() - time_start < 1 / 50
+
+
+@pytest.mark.parametrize('key', ['REFRESH_INTERVAL', 'REFRESH_CONCURRENCY', 'REFRESH_HOST_RATE'])
+def test_refresh_config_rejects_not_positive_values(monkeypatch, key: str):
+    monkeypatch.setenv(key, '0')
+
+    with pytest.raises(ValueError, match=key):
+        load_config_refresh()
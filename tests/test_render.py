@@ -0,0 +1,91 @@
+import os
+import timeit
+
+import pytest
+
+from services.render import group_lessons_by_day, render_week, render_day
+from services.timetable import TimetableLesson
+
+_lessons_count = 100
+
+# Timings depend on runner, so benchmark only reports them and is run on demand
+benchmark = pytest.mark.skipif(
+    not os.getenv('RUN_BENCHMARKS'), reason='benchmarks are run with RUN_BENCHMARKS=1'
+)
+
+
+def _make_lessons(count: int) -> list[TimetableLesson]:
+    lessons = [
+        TimetableLesson(
+            day=i % 6 + 1, number_lesson=i // 6 % 7 + 1, discipline=f'Дисципліна {i}',
+            teachers=tuple(f'Викладач {i}-{j}' for j in range(i % 3)),
+            type_and_location='Немає інформації' if i % 2 else f'Лекція, ауд. {i}'
+        )
+        for i in range(count)
+    ]
+    return sorted(lessons, key=lambda lesson: (lesson.day, lesson.number_lesson))
+
+
+def test_lessons_are_grouped_by_day_in_one_pass():
+    lessons = _make_lessons(20)
+    days = list(group_lessons_by_day(iter(lessons)))
+
+    assert [day for day, _ in days] == [1, 2, 3, 4, 5, 6]
+    assert [lesson for _, day_lessons in days for lesson in day_lessons] == lessons
+
+
+def test_layouts_are_rendered_byte_for_byte():
+    lessons = [
+        TimetableLesson(1, 1, 'Фізика', ('Іваненко І. І.', 'Петренко П. П.'), 'Лекція, ауд. 1'),
+        TimetableLesson(1, 3, 'Хімія', (), 'Немає інформації'),
+        TimetableLesson(4, 2, 'Історія', ('Сидоренко С. С.',), 'Немає інформації'),
+    ]
+
+    assert render_week('ІН-01', lessons, next_week=True) == (
+        '<b>Пари наступного тижня у групи ІН-01:</b>\n\n'
+        '<em><b>Понеділок:</b></em>\n'
+        '<b>[1]</b> <em>Фізика</em>\n<em>Іваненко І. І., Петренко П. П.</em>\n'
+        '<b>[3]</b> <em>Хімія</em>\n'
+        '\n'
+        '<em><b>Четвер:</b></em>\n'
+        '<b>[2]</b> <em>Історія</em>\n<em>Сидоренко С. С.</em>\n'
+        '\n'
+    )
+    assert render_day('ІН-01', lessons[:2], tomorrow=False) == (
+        '<b>Пари сьогодні у групи ІН-01:</b>\n\n'
+        '<b>[1] <em>[8:30-10:05]</em></b> <em>Фізика</em>\n'
+        '<em>Іваненко І. І., Петренко П. П.</em>\n'
+        '<em><b>Інформація:</b> Лекція, ауд. 1</em>\n\n'
+        '<b>[3] <em>[12:20-13:55]</em></b> <em>Хімія</em>\n'
+        '\n'
+    )
+
+
+def test_day_without_lessons_is_rendered():
+    assert render_day('ІН-01', (), tomorrow=True) == (
+        '<b>У групи <em>ІН-01</em> завтра немає пар</b>'
+    )
+
+
+def test_every_lesson_of_100_is_rendered():
+    lessons = _make_lessons(_lessons_count)
+    week = render_week('ІН-01', lessons, next_week=False)
+    day = render_day('ІН-01', lessons, tomorrow=False)
+
+    for lesson in lessons:
+        assert week.count(f'<em>{lesson.discipline}</em>\n') == 1
+        assert day.count(f'<em>{lesson.discipline}</em>\n') == 1
+
+
+@benchmark
+def test_render_time_per_100_lessons():
+    lessons = _make_lessons(_lessons_count)
+    views = {
+        'week': lambda: render_week('ІН-01', lessons, next_week=False),
+        'day': lambda: render_day('ІН-01', lessons, tomorrow=False),
+    }
+
+    for name, render in views.items():
+        number = 200
+        seconds = min(timeit.repeat(render, number=number, repeat=3)) / number
+        print(f'\nrender {name} of {_lessons_count} lessons: {seconds * 1e6:.1f} us')
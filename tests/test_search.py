@@ -0,0 +1,46 @@
+from services.search import GroupTitleIndex, normalize_group_title
+
+_groups = [(1, 'ЛА-п11'), (2, 'ЛА-п12'), (3, 'ЛА-п11'), (4, 'ТІ-01'), (5, 'ІО-21')]
+
+
+def test_titles_are_normalized():
+    assert {normalize_group_title(title) for title in ('ЛА-п11', 'ла п11', 'лап11', 'ЛA-п11')} == {
+        'лап11'
+    }
+    assert normalize_group_title('TI-01') == normalize_group_title('ТІ 01')
+
+
+def test_groups_with_same_normalized_title_are_found_exactly():
+    matches = GroupTitleIndex(_groups).search('ла п11')
+
+    assert [(match.group_id, match.is_exact) for match in matches] == [(1, True), (3, True)]
+
+
+def test_groups_are_found_by_prefix_before_typos():
+    index = GroupTitleIndex(_groups)
+
+    assert [match.group_id for match in index.search('ЛА-п1')] == [1, 3, 2]
+    assert [(match.group_id, match.rank) for match in index.search('ТІ-10')] == [(4, 2)]
+    assert [(match.group_id, match.rank) for match in index.search('ІО-2')] == [(5, 1)]
+    assert index.search('ХХ-99') == []
+
+
+def test_message_without_text_finds_nothing():
+    index = GroupTitleIndex(_groups)
+
+    assert index.search(None) == [] and index.search('--') == []
+
+
+def test_thousands_of_groups_are_searched():
+    index = GroupTitleIndex(
+        (group_id, f'{prefix}-{number:02}')
+        for group_id, (prefix, number) in enumerate(
+            ((prefix, number) for prefix in ('ЛА', 'ТІ', 'ІО', 'КВ', 'ІП', 'ФЕ', 'ДА', 'БС')
+             for number in range(1, 500)), 1
+        )
+    )
+
+    assert len(index) == 8 * 499
+    assert [match.title for match in index.search('ла-41')] == ['ЛА-41']
+    assert [match.title for match in index.search('ТІ 1', limit=2)] == ['ТІ-10', 'ТІ-100']
+    assert [match.title for match in index.search('KB-l7', limit=2)] == ['КВ-07', 'КВ-17']
@@ -0,0 +1,82 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from database.base import Base
+from database.models import User, Faculty, Department, Group
+from services.utils import upsert
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as connection:
+        await connection.run_sync(
+            Base.metadata.create_all,
+            tables=[Faculty.__table__, Department.__table__, Group.__table__, User.__table__]
+        )
+
+    async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+        yield session
+    await engine.dispose()
+
+
+def _count_statements(session: AsyncSession) -> list[str]:
+    statements = []
+    event.listen(
+        session.bind.sync_engine, 'before_cursor_execute',
+        lambda *args: statements.append(args[2])
+    )
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_row_is_inserted_by_one_statement(session):
+    statements = _count_statements(session)
+    faculty, is_created = await upsert(
+        Faculty, {'title': 'Інженерно-хімічний факультет', 'title_short': 'ІХФ'}, session=session
+    )
+
+    assert is_created and faculty.id is not None and faculty.title_short == 'ІХФ'
+    assert len(statements) == 1 and 'ON CONFLICT' in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_existing_row_is_returned_by_natural_key(session):
+    faculty, _ = await upsert(Faculty, {'title': 'ІХФ', 'title_short': 'ІХФ'}, session=session)
+    department, _ = await upsert(
+        Department, {'faculty_id': faculty.id, 'title': 'ТПЗА', 'title_short': 'ТПЗА'},
+        session=session
+    )
+    group, _ = await upsert(
+        Group, {'department_id': department.id, 'title': 'ЛА-п11'}, session=session
+    )
+    same_group, is_created = await upsert(
+        Group, {'department_id': department.id, 'title': 'ЛА-п11', 'schedule_url': 'url'},
+        session=session
+    )
+
+    assert not is_created and same_group.id == group.id and same_group.schedule_url is None
+
+
+@pytest.mark.asyncio
+async def test_existing_row_is_updated_only_if_changed(session):
+    user, is_written = await upsert(User, {'id': 1, 'is_admin': True}, session=session)
+    assert is_written and user.is_admin
+
+    user, is_written = await upsert(
+        User, {'id': 1, 'is_admin': False}, update=('is_admin',), session=session
+    )
+    assert is_written and not user.is_admin
+
+    _, is_written = await upsert(
+        User, {'id': 1, 'is_admin': False}, update=('is_admin',), session=session
+    )
+    assert not is_written
+
+
+@pytest.mark.asyncio
+async def test_values_without_natural_key_are_rejected(session):
+    with pytest.raises(ValueError):
+        await upsert(Group, {'title': 'ЛА-п11'}, session=session)
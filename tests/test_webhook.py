@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer, unused_port
+from aiogram import Bot, Dispatcher, Router, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import Command
+from aiogram.methods import SendMessage
+
+from config_loader import WebhookConfig, load_config_webhook
+from webhook import run_webhook
+
+_secret_token = 'secret-token'
+
+
+class FakeTelegram:
+    """Telegram Bot API server, which records called methods"""
+
+    def __init__(self):
+        self.calls: list[tuple[str, dict]] = []
+        self.webhook_set = asyncio.Event()
+        self.message_sent = asyncio.Event()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        data = dict(await request.post())
+        self.calls.append((method, data))
+
+        match method:
+            case 'setWebhook':
+                self.webhook_set.set()
+                result = True
+            case 'sendMessage':
+                self.message_sent.set()
+                result = {
+                    'message_id': 2, 'date': int(time.time()), 'text': data['text'],
+                    'chat': {'id': int(data['chat_id']), 'type': 'private'},
+                }
+            case _:
+                result = True
+        return web.json_response({'ok': True, 'result': result})
+
+
+@pytest_asyncio.fixture
+async def fake_telegram():
+    telegram = FakeTelegram()
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', telegram.handle)
+    async with TestServer(app) as server:
+        yield telegram, server
+
+
+def _make_update(text: str) -> dict:
+    return {
+        'update_id': 1,
+        'message': {
+            'message_id': 1, 'date': int(time.time()), 'text': text,
+            'chat': {'id': 1, 'type': 'private'},
+            'from': {'id': 1, 'is_bot': False, 'first_name': 'Тест'},
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_webhook_feeds_updates_signed_by_secret_token(fake_telegram):
+    telegram, telegram_server = fake_telegram
+    router = Router()
+
+    @router.message(Command('today'))
+    async def today(msg: types.Message) -> SendMessage:
+        return msg.answer('Пари сьогодні')
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(str(telegram_server.make_url('/'))))
+    bot = Bot('42:TEST', session=session)
+    config = WebhookConfig(
+        url='https://bot.example.com/', path='/webhook', host='127.0.0.1', port=unused_port(),
+        secret_token=_secret_token
+    )
+    webhook_url = f'http://{config.host}:{config.port}{config.path}'
+
+    webhook_task = asyncio.create_task(run_webhook(dp, bot, config))
+    try:
+        await asyncio.wait_for(telegram.webhook_set.wait(), 5)
+        async with aiohttp.ClientSession() as client:
+            async with client.post(webhook_url, json=_make_update('/today')) as response:
+                unsigned_status = response.status
+            async with client.post(
+                    webhook_url, json=_make_update('/today'),
+                    headers={'X-Telegram-Bot-Api-Secret-Token': _secret_token}
+            ) as response:
+                signed_status = response.status
+        await asyncio.wait_for(telegram.message_sent.wait(), 5)
+    finally:
+        webhook_task.cancel()
+        await asyncio.gather(webhook_task, return_exceptions=True)
+        await bot.session.close()
+
+    set_webhook = telegram.calls[0]
+    assert set_webhook[0] == 'setWebhook'
+    assert set_webhook[1]['url'] == 'https://bot.example.com/webhook'
+    assert set_webhook[1]['secret_token'] == _secret_token
+    assert unsigned_status == 401 and signed_status == 200
+    assert [method for method, _ in telegram.calls] == ['setWebhook', 'sendMessage']
+
+
+@pytest.mark.asyncio
+async def test_webhook_responds_before_update_is_handled(fake_telegram):
+    telegram, telegram_server = fake_telegram
+    router = Router()
+    handling_allowed = asyncio.Event()
+
+    @router.message(Command('today'))
+    async def today(msg: types.Message) -> SendMessage:
+        await handling_allowed.wait()
+        return msg.answer('Пари сьогодні')
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(str(telegram_server.make_url('/'))))
+    bot = Bot('42:TEST', session=session)
+    config = WebhookConfig(
+        url='https://bot.example.com/', path='/webhook', host='127.0.0.1', port=unused_port(),
+        secret_token=_secret_token
+    )
+    webhook_url = f'http://{config.host}:{config.port}{config.path}'
+
+    webhook_task = asyncio.create_task(run_webhook(dp, bot, config))
+    try:
+        await asyncio.wait_for(telegram.webhook_set.wait(), 5)
+        async with aiohttp.ClientSession() as client:
+            async with client.post(
+                    webhook_url, json=_make_update('/today'),
+                    headers={'X-Telegram-Bot-Api-Secret-Token': _secret_token}
+            ) as response:
+                status = response.status
+        is_sent_before_handled = telegram.message_sent.is_set()
+        handling_allowed.set()
+        await asyncio.wait_for(telegram.message_sent.wait(), 5)
+    finally:
+        webhook_task.cancel()
+        await asyncio.gather(webhook_task, return_exceptions=True)
+        await bot.session.close()
+
+    assert status == 200 and not is_sent_before_handled
+
+
+def test_webhook_config_requires_url_and_secret_token(monkeypatch):
+    monkeypatch.delenv('WEBHOOK_URL', raising=False)
+    monkeypatch.setenv('WEBHOOK_SECRET', _secret_token)
+    with pytest.raises(ValueError, match='WEBHOOK_URL'):
+        load_config_webhook()
+
+    monkeypatch.setenv('WEBHOOK_URL', 'https://bot.example.com')
+    monkeypatch.delenv('WEBHOOK_SECRET')
+    with pytest.raises(ValueError, match='WEBHOOK_SECRET'):
+        load_config_webhook()